@@ -3,13 +3,105 @@
 
 import random
 import copy
-from pieces import Piece, PieceType, PieceColor, GameState
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from pieces import PieceType, PieceColor, GameState, get_piece
 from constants import BOARD_SIZE # We will need BOARD_SIZE from constants
+from zobrist import compute_key, move_key_delta, reserve_key_delta, SIDE_TO_MOVE_KEY
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from rules import THREE_IN_ROW_LINES, LINES_THROUGH_CELL
+from search_stats import SearchStats
+from book import OpeningBook
+from bitboard import BitBoard
+from pn_search import ProofNumberSolver, has_win_threat, winning_move
+
+# NumPy is only needed for batch leaf evaluation
+try:
+    import batch_eval
+except ImportError:
+    batch_eval = None
+
+WIN_SCORE = 10000
+MAX_SEARCH_DEPTH = 64 # Deepest iteration a time-limited search will start
+ASPIRATION_WINDOW = 4 # Half-width of the window around the previous iteration's score
+STOP_POLL_SECONDS = 0.05 # How often a parallel search checks for stop() while the workers search
+
+# For each cell, the neighbors that a piece placed there would boop off the board
+EDGE_BOOPS = [[[(x + dx, y + dy)
+                for dx in [-1, 0, 1] for dy in [-1, 0, 1]
+                if (dx, dy) != (0, 0)
+                and 0 <= x + dx < BOARD_SIZE and 0 <= y + dy < BOARD_SIZE
+                and not (0 <= x + 2 * dx < BOARD_SIZE and 0 <= y + 2 * dy < BOARD_SIZE)]
+               for x in range(BOARD_SIZE)]
+              for y in range(BOARD_SIZE)]
+
+# For each cell, the cells a piece could be placed on to boop a piece there off the board
+EDGE_BOOPERS = [[[] for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+for _y in range(BOARD_SIZE):
+    for _x in range(BOARD_SIZE):
+        for _tx, _ty in EDGE_BOOPS[_y][_x]:
+            EDGE_BOOPERS[_ty][_tx].append((_x, _y))
+
+# Default node cap for the quiescence search under one leaf. Off by default: forcing_moves rescans the board at
+# every leaf, which makes a depth 3 search about 4x slower while adding only a few percent more nodes. 16 is a
+# sensible cap when turning it on.
+QUIESCENCE_NODES = 0
+MAX_QUIESCENCE_DEPTH = 8 # Most forcing moves quiescence search will follow past a leaf
+
+BATCH_LEAF_CHUNK = 4 # Leaves in the first NumPy batch under a depth 1 node; each later batch is twice as big
+
+SOLVER_NODES = 500 # Default node budget for the forced-win solver, about 0.1s per solve
+SOLVER_TIME_SHARE = 0.25 # Most of a time-limited move the solver may use; the search gets the rest
+
+# Move ordering priorities: transposition table move, then tactical moves, then killer moves, then history
+TT_MOVE_PRIORITY = 1 << 40
+TACTICAL_PRIORITY = 1 << 30
+KILLER_PRIORITY = 1 << 29
+
+# Raised inside the search when a time-limited search runs out of time
+class SearchTimeout(Exception):
+    pass
 
 class BoopAI:
-    def __init__(self, game_instance, depth):
-        self.game = game_instance # Reference to the main game object for rule checks
+    # time_limit is seconds per move; when set the search deepens until time runs out instead of using depth.
+    # workers > 1 splits the root moves across that many worker processes.
+    # batch_leaves scores the leaf children of each depth 1 node in NumPy batches (see batch_eval.py).
+    # stats_log is a file to append each search's statistics to as a line of JSON.
+    # use_book plays moves from the opening book (opening_book.bin, see book.py) when the position is in it.
+    # It is off by default: book moves come from deep searches, so they would hide the AI's own depth or time.
+    # solver_nodes is the node budget for proving a forced win (see pn_search.py) when the side to move has a
+    # win threat; 0 turns the solver off. A time-limited move also gives the solver at most SOLVER_TIME_SHARE
+    # of its time.
+    # quiescence_nodes caps the quiescence search below each leaf (forcing moves only, see quiescence);
+    # 0 (the default) turns it off and leaves are scored by eval_board alone.
+    def __init__(self, game_instance, depth, tt_size_mb=64, time_limit=None, workers=1, batch_leaves=False,
+                 stats_log=None, use_book=False, solver_nodes=SOLVER_NODES, quiescence_nodes=QUIESCENCE_NODES):
+        if batch_leaves and batch_eval is None:
+            raise ImportError("batch_leaves needs numpy: pip install numpy")
+        self.game = game_instance # Rules object (BoopRules or BoopGame) used for rule checks
         self.depth = depth
+        self.time_limit = time_limit
+        self.tt_size_mb = tt_size_mb
+        self.workers = workers
+        self.batch_leaves = batch_leaves
+        self.stats_log = stats_log
+        self.book = _default_book() if use_book else None
+        self.solver = ProofNumberSolver(solver_nodes) if solver_nodes > 0 else None
+        self.quiescence_nodes = quiescence_nodes
+        self.quiescence_budget = 0 # Nodes the quiescence search under the current leaf may still visit
+        self.stats = SearchStats(MAX_SEARCH_DEPTH + 2) # Counters for the current (or last) search
+        self.pool = None # Worker processes, started on the first parallel search and kept warm after that
+        self.shared_bound = None # Best root score found so far by any worker, from the mover's point of view
+        self.search_id = 0
+        self.deadline = None # perf_counter() time the current search must stop by, if any
+        self.stop_time = None # Like deadline, but set from another thread with stop() and never by the search
+        self.stop_flag = None # In a worker process, the shared flag the parent raises to stop the search
+        self.shared_stop = None # In the parent, that flag for its worker processes
+        self.tt = TranspositionTable(tt_size_mb) # Kept across moves, so later searches reuse earlier results
+        self.search_depth = depth # Depth of the current root search, so nodes know their ply
+        self.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 1)] # Two moves per ply that caused cutoffs
+        self.history = {} # (player_idx, move) -> how often and how deep the move caused a cutoff
 
     # Get all possible moves for the current player
     def get_possible_moves(self, player_idx, board, orange_cats, black_cats):
@@ -62,155 +154,715 @@ class BoopAI:
         return score
 
     
-    # Minimax with alpha-beta pruning
-    def minimax(self, board, orange_cats, black_cats, depth, alpha, beta, maximizing_player, current_player_idx):
-        # Check for terminal states
-        if self.game.player_won(1, board, orange_cats, black_cats):  # Black wins
-            return -10000 - depth
-        if self.game.player_won(0, board, orange_cats, black_cats):  # Orange wins
-            return 10000 + depth
-
-        if depth == 0:
-            return self.eval_board(board, orange_cats, black_cats)
-
-        moves = self.get_possible_moves(current_player_idx, board, orange_cats, black_cats)
+    # Apply a move in place on a GameState for the player to move: place the piece, boop, graduate any trio
+    # and hand the turn over. Returns an undo record that undo_move uses to restore the exact prior state.
+    def apply_move(self, state, move):
+        x, y, piece_type = move
+        player_idx = state.current_player
+        board = state.board
+        undo = {
+            'move': move,
+            'orange_cats': state.orange_cats,
+            'black_cats': state.black_cats,
+            'trios_clean': state.trios_clean,
+            'key': state.key,
+            'boops': [],
+            'trio': None
+        }
+
+        placed_piece = get_piece(piece_type, PieceColor.ORANGE if player_idx == 0 else PieceColor.BLACK)
+        board[y][x] = placed_piece
+        if piece_type == PieceType.CAT:
+            if player_idx == 0:
+                state.orange_cats -= 1
+            else:
+                state.black_cats -= 1
+
+        # Apply booping (pieces booped off the board are kept in the boop list)
+        undo['boops'] = self.game.check_boop(x, y, board)
+
+        # Check for three in a row, only on the lines this move changed when no trio was left on the board
+        lines = self.game.lines_changed_by_move(x, y, undo['boops']) if state.trios_clean else None
+        three_result = self.game.first_three_in_row(player_idx, board, lines)
+        if three_result['found']:
+            undo['trio'] = [(px, py, board[py][px]) for px, py in three_result['positions']]
+            for px, py in three_result['positions']:
+                board[py][px] = None
+            if player_idx == 0:
+                state.orange_cats += 3
+            else:
+                state.black_cats += 3
+        state.trios_clean = not self.game.trio_on_board(board, lines)
+
+        state.key ^= move_key_delta(x, y, placed_piece, undo['boops'], undo['trio']) ^ \
+            reserve_key_delta(undo['orange_cats'], undo['black_cats'], state.orange_cats, state.black_cats) ^ \
+            SIDE_TO_MOVE_KEY
+        state.current_player = 1 - player_idx
+        return undo
+
+    # Undo a move made with apply_move, restoring the board, reserve cats and player to move
+    def undo_move(self, state, undo):
+        board = state.board
+        if undo['trio']:
+            for px, py, piece in undo['trio']:
+                board[py][px] = piece
+        for boop in reversed(undo['boops']):
+            from_x, from_y = boop['from']
+            to_x, to_y = boop['to']
+            if to_x >= 0:
+                board[to_y][to_x] = None
+            board[from_y][from_x] = boop['piece']
+        x, y, _ = undo['move']
+        board[y][x] = None
+
+        state.orange_cats = undo['orange_cats']
+        state.black_cats = undo['black_cats']
+        state.trios_clean = undo['trios_clean']
+        state.key = undo['key']
+        state.current_player = 1 - state.current_player
+
+    # Quick look at a move before it is made, used only for ordering: a bonus if it lines up with two of the
+    # mover's pieces (ignoring boops) plus one for each opponent piece it would boop off the board.
+    def tactical_score(self, board, move, player_idx):
+        x, y, piece_type = move
+        my_color = PieceColor.ORANGE if player_idx == 0 else PieceColor.BLACK
+        score = 0
+
+        for line_idx in LINES_THROUGH_CELL[y][x]:
+            owned = 0
+            for cx, cy in THREE_IN_ROW_LINES[line_idx]:
+                piece = board[cy][cx]
+                if piece is not None and piece.color == my_color:
+                    owned += 1
+            if owned == 2:
+                score += 100
+                break
+
+        for tx, ty in EDGE_BOOPS[y][x]:
+            target = board[ty][tx]
+            if target is None or target.color == my_color:
+                continue
+            if target.type == PieceType.CAT:
+                if piece_type == PieceType.CAT: # A kitten cannot boop cats
+                    score += 20
+            else:
+                score += 10
+        return score
 
-        if not moves: # No possible moves, evaluate current board
-            return self.eval_board(board, orange_cats, black_cats)
+    # Moves worth following past the search horizon: ones that fill the empty cell of a line holding two of the
+    # mover's pieces (a kitten to make a trio, or a cat to make three cats in a row), ones that boop an opponent
+    # piece off the board, and every cat placement when the mover has seven cats on the board (the eighth wins).
+    # Trio moves come first.
+    def forcing_moves(self, board, player_idx, orange_cats, black_cats):
+        my_color = PieceColor.ORANGE if player_idx == 0 else PieceColor.BLACK
+        has_cats = (orange_cats if player_idx == 0 else black_cats) > 0
+        moves = []
+        cells = set()
+
+        for line in THREE_IN_ROW_LINES:
+            owned = 0
+            owned_cats = 0
+            empty = None
+            for cx, cy in line:
+                piece = board[cy][cx]
+                if piece is None:
+                    empty = (cx, cy)
+                elif piece.color == my_color:
+                    owned += 1
+                    if piece.type == PieceType.CAT:
+                        owned_cats += 1
+            if owned == 2 and empty is not None and empty not in cells:
+                # A kitten makes a trio; a cat next to two cats makes three cats in a row
+                cells.add(empty)
+                if owned_cats == 2 and has_cats:
+                    moves.append((empty[0], empty[1], PieceType.CAT))
+                else:
+                    moves.append((empty[0], empty[1], PieceType.KITTEN))
 
-        if maximizing_player: # Orange (Player 0) is maximizing
-            max_eval = float('-inf')
-            for move in moves:
-                x, y, piece_type = move
+        my_cats = 0
+        for y in range(BOARD_SIZE):
+            for x in range(BOARD_SIZE):
+                target = board[y][x]
+                if target is None:
+                    continue
+                if target.color == my_color:
+                    if target.type == PieceType.CAT:
+                        my_cats += 1
+                    continue
+                # A kitten cannot boop cats, and a kitten is enough to boop a kitten
+                if target.type == PieceType.CAT:
+                    if not has_cats:
+                        continue
+                    piece_type = PieceType.CAT
+                else:
+                    piece_type = PieceType.KITTEN
+                for cx, cy in EDGE_BOOPERS[y][x]:
+                    if board[cy][cx] is None and (cx, cy, piece_type) not in moves:
+                        moves.append((cx, cy, piece_type))
+
+        if my_cats == 7 and has_cats:
+            for y in range(BOARD_SIZE):
+                for x in range(BOARD_SIZE):
+                    if board[y][x] is None and (x, y, PieceType.CAT) not in moves:
+                        moves.append((x, y, PieceType.CAT))
+        return moves
 
-                # Make the move on a copy
-                new_board = [row[:] for row in board]
-                new_orange_cats = orange_cats
-                new_black_cats = black_cats
+    # Sort moves so the ones most likely to cause a cutoff come first: the transposition table move, then moves
+    # that form a trio or boop opponent pieces off the board, then this ply's killer moves, then by history
+    def order_moves(self, board, moves, player_idx, tt_move, ply):
+        killers = self.killers[ply]
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return TT_MOVE_PRIORITY
+            tactical = self.tactical_score(board, move, player_idx)
+            if tactical:
+                return TACTICAL_PRIORITY + tactical
+            if move == killers[0]:
+                return KILLER_PRIORITY + 1
+            if move == killers[1]:
+                return KILLER_PRIORITY
+            return history.get((player_idx, move), 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
 
-                new_board[y][x] = Piece(piece_type, PieceColor.ORANGE) # Assuming current_player_idx is 0
-                if piece_type == PieceType.CAT:
-                    new_orange_cats -= 1
+    # Remember a move that caused a beta cutoff: as a killer for this ply and in the history table
+    def record_cutoff(self, move, player_idx, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (player_idx, move)
+        self.history[key] = min(self.history.get(key, 0) + depth * depth, KILLER_PRIORITY - 1)
+
+    # Win scores are 10000 + remaining depth, so faster wins score higher. In the transposition table they are
+    # stored relative to the node's own depth, so they stay correct when the entry is reused at another depth.
+    def score_to_tt(self, score, depth):
+        if score >= WIN_SCORE - 1000:
+            return score - depth
+        if score <= -WIN_SCORE + 1000:
+            return score + depth
+        return score
 
-                # Apply booping
-                # We need to make sure check_boop doesn't modify the main game board but the new_board
-                self.game.check_boop(x, y, new_board)
+    def score_from_tt(self, score, depth):
+        if score >= WIN_SCORE - 1000:
+            return score + depth
+        if score <= -WIN_SCORE + 1000:
+            return score - depth
+        return score
 
-                # Check for three in a row
-                three_result = self.game.first_three_in_row(current_player_idx, new_board)
-                if three_result['found']:
-                    for px, py in three_result['positions']:
-                        new_board[py][px] = None
-                    new_orange_cats += 3
+    # eval_board scores of some children of a depth 1 node, in move order, computed in one batch.
+    # Without quiescence search these are what negamax(child, 0, ...) returns, from orange's point of view.
+    def batch_leaf_scores(self, state, moves):
+        boards = []
+        orange_cats = []
+        black_cats = []
+        for move in moves:
+            undo = self.apply_move(state, move)
+            boards.append(batch_eval.encode_cells(state.board))
+            orange_cats.append(state.orange_cats)
+            black_cats.append(state.black_cats)
+            self.undo_move(state, undo)
+        self.stats.leaf_evals += len(moves)
+        self.stats.nodes_by_ply[self.search_depth] += len(moves)
+        return batch_eval.evaluate_boards(boards, orange_cats, black_cats).tolist()
+
+    # Score of a leaf child from the mover's point of view, given the child's eval_board score (from
+    # batch_leaf_scores), with the quiescence search below it when that is on
+    def batch_leaf_score(self, state, move, leaf_score, alpha, beta):
+        score = leaf_score if state.current_player == 0 else -leaf_score
+        if not self.quiescence_nodes or abs(score) >= WIN_SCORE:
+            return score
+        undo = self.apply_move(state, move)
+        self.quiescence_budget = self.quiescence_nodes
+        score = -self.quiescence(state, -beta, -alpha, MAX_QUIESCENCE_DEPTH, -score)
+        self.undo_move(state, undo)
+        return score
 
-                # Recursive call for the next player (minimizing player)
-                eval_score = self.minimax(new_board, new_orange_cats, new_black_cats,
-                                        depth - 1, alpha, beta, False, 1 - current_player_idx)
+    # Quiescence search below a leaf: keep playing forcing moves (see forcing_moves) so a position isn't scored
+    # just before a trio graduates or pieces get booped off the board. The side to move may instead stand pat on
+    # the eval_board score, so that score is a bound on the result. Stops after MAX_QUIESCENCE_DEPTH moves or
+    # when quiescence_budget runs out. Scores are from the side to move's point of view, like negamax;
+    # stand_pat is the position's eval_board score (from that point of view) if the caller already has it.
+    def quiescence(self, state, alpha, beta, qdepth, stand_pat=None):
+        board, orange_cats, black_cats = state.board, state.orange_cats, state.black_cats
+        stats = self.stats
+
+        if stand_pat is None:
+            color = 1 if state.current_player == 0 else -1
+            if self.game.player_won(1, board, orange_cats, black_cats):  # Black wins
+                return -color * WIN_SCORE
+            if self.game.player_won(0, board, orange_cats, black_cats):  # Orange wins
+                return color * WIN_SCORE
+            stats.leaf_evals += 1
+            stand_pat = color * self.eval_board(board, orange_cats, black_cats)
+
+        if qdepth == 0 or self.quiescence_budget <= 0 or stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        if self.out_of_time():
+            raise SearchTimeout()
+
+        best_score = stand_pat
+        for move in self.forcing_moves(board, state.current_player, orange_cats, black_cats):
+            if self.quiescence_budget <= 0:
+                break
+            self.quiescence_budget -= 1
+            stats.quiescence_nodes += 1
+
+            undo = self.apply_move(state, move)
+            score = -self.quiescence(state, -beta, -alpha, qdepth - 1)
+            self.undo_move(state, undo)
+
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best_score
+
+    # Negamax with alpha-beta pruning on a single GameState that is modified in place and restored after each
+    # move. Scores are from the point of view of the player to move (eval_board's score for orange, negated for
+    # black), so one code path serves both players.
+    # After the first move, which good ordering makes the likely best, moves are searched with a null window
+    # (principal variation search) that only shows whether they beat the best so far; a move that does is
+    # searched again with the full window to get its score.
+    def negamax(self, state, depth, alpha, beta):
+        board, orange_cats, black_cats = state.board, state.orange_cats, state.black_cats
+
+        if self.out_of_time():
+            raise SearchTimeout()
+
+        stats = self.stats
+        ply = self.search_depth - depth
+        stats.nodes_by_ply[ply] += 1
+        color = 1 if state.current_player == 0 else -1
 
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
+        # Check for terminal states
+        if self.game.player_won(1, board, orange_cats, black_cats):  # Black wins
+            return -color * (WIN_SCORE + depth)
+        if self.game.player_won(0, board, orange_cats, black_cats):  # Orange wins
+            return color * (WIN_SCORE + depth)
 
+        if depth == 0:
+            stats.leaf_evals += 1
+            score = color * self.eval_board(board, orange_cats, black_cats)
+            if self.quiescence_nodes:
+                self.quiescence_budget = self.quiescence_nodes
+                score = self.quiescence(state, alpha, beta, MAX_QUIESCENCE_DEPTH, score)
+            return score
+
+        # Reuse a stored result if this position was already searched at least as deep
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.probe(state.key)
+        stats.tt_probes += 1
+        if entry is not None:
+            stats.tt_hits += 1
+            _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+            if entry_depth >= depth:
+                entry_score = self.score_from_tt(entry_score, depth)
+                if entry_bound == EXACT:
+                    stats.tt_cutoffs += 1
+                    return entry_score
+                elif entry_bound == LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
                 if beta <= alpha:
-                    break  # Alpha-beta pruning
-            return max_eval
-        else: # Black (Player 1) is minimizing
-            min_eval = float('inf')
-            for move in moves:
-                x, y, piece_type = move
-
-                # Make the move on a copy
-                new_board = [row[:] for row in board]
-                new_orange_cats = orange_cats
-                new_black_cats = black_cats
-
-                new_board[y][x] = Piece(piece_type, PieceColor.BLACK) # Assuming current_player_idx is 1
-                if piece_type == PieceType.CAT:
-                    new_black_cats -= 1
-
-                # Apply booping
-                self.game.check_boop(x, y, new_board)
-
-                # Check for three in a row
-                three_result = self.game.first_three_in_row(current_player_idx, new_board)
-                if three_result['found']:
-                    for px, py in three_result['positions']:
-                        new_board[py][px] = None
-                    new_black_cats += 3
-
-                # Recursive call for the next player (maximizing player)
-                eval_score = self.minimax(new_board, new_orange_cats, new_black_cats,
-                                        depth - 1, alpha, beta, True, 1 - current_player_idx)
-
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
+                    stats.tt_cutoffs += 1
+                    return entry_score
 
-                if beta <= alpha:
-                    break  # Alpha-beta pruning
-            return min_eval
+        moves = self.get_possible_moves(state.current_player, board, orange_cats, black_cats)
 
-    # Get the best move for AI
-    def get_best_move(self, board, orange_cats, black_cats, current_player_idx):
-        best_move = None
-        
-        moves = self.get_possible_moves(current_player_idx, board, orange_cats, black_cats)
+        if not moves: # No possible moves, evaluate current board
+            stats.leaf_evals += 1
+            return color * self.eval_board(board, orange_cats, black_cats)
 
-        # Shuffle moves to add variety, especially helpful if multiple moves have the same score
-        random.shuffle(moves)
+        self.order_moves(board, moves, state.current_player, tt_move, ply)
 
-        # Determine if AI is maximizing or minimizing based on whose turn it is
-        maximizing_player = (current_player_idx == 0) # Orange is maximizing, Black is minimizing
+        # Every child of a depth 1 node is a leaf. With batch_leaves the first child, the one most likely to
+        # cause a cutoff, is scored on its own and the rest in batches of growing size, so a cutoff still
+        # saves scoring the leaves after it.
+        batch = depth == 1 and self.batch_leaves
+        leaf_scores = [None] # Batch scores of the children so far, by move index
+        chunk = BATCH_LEAF_CHUNK
 
-        if maximizing_player:
-            best_score = float('-inf')
+        best_score = float('-inf')
+        best_move = None
+        for i, move in enumerate(moves):
+            if batch and i > 0:
+                if i == len(leaf_scores):
+                    leaf_scores += self.batch_leaf_scores(state, moves[i:i + chunk])
+                    chunk *= 2
+                score = self.batch_leaf_score(state, move, leaf_scores[i], alpha, beta)
+            else:
+                undo = self.apply_move(state, move)
+                if i == 0:
+                    score = -self.negamax(state, depth - 1, -beta, -alpha)
+                else:
+                    score = -self.negamax(state, depth - 1, -alpha - 1, -alpha)
+                    if alpha < score < beta: # Better than the best so far: get its real score
+                        score = -self.negamax(state, depth - 1, -beta, -alpha)
+                self.undo_move(state, undo)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+
+            if alpha >= beta:
+                stats.record_cutoff(i)
+                self.record_cutoff(move, state.current_player, depth, ply)
+                break  # Alpha-beta pruning
+
+        # A score outside the original window is only a bound on the true value
+        if best_score <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
         else:
-            best_score = float('inf')
+            bound = EXACT
+        self.tt.store(state.key, depth, self.score_to_tt(best_score, depth), bound, best_move)
+        return best_score
+
+    # Score of one root move from the mover's point of view. Only moves that match or beat best_score matter,
+    # so the window starts just below it (scores are whole numbers) and worse moves fail low early. Once there
+    # is a best score a null window first checks whether the move reaches it at all.
+    def search_root_move(self, state, move, depth, alpha, beta, best_score):
+        floor = max(alpha, best_score - 1)
+        undo = self.apply_move(state, move)
+        try:
+            if best_score == float('-inf') or floor + 1 >= beta:
+                score = -self.negamax(state, depth - 1, -beta, -floor)
+            else:
+                score = -self.negamax(state, depth - 1, -floor - 1, -floor)
+                if score > floor:
+                    score = -self.negamax(state, depth - 1, -beta, -floor)
+        finally:
+            self.undo_move(state, undo)
+        return score
 
-        for move in moves:
-            x, y, piece_type = move
+    # Search every root move to the given depth within the window (alpha, beta). Returns the moves tied for the
+    # best score, that score and the score of each move, all from the mover's point of view. Moves that can't
+    # match the best score only get a bound as their score. A best score at or below alpha or at or above beta
+    # is only a bound too (the search stops at the first move that reaches beta), and the caller has to search
+    # again with a wider window.
+    def search_root(self, state, moves, depth, alpha=float('-inf'), beta=float('inf')):
+        self.search_depth = depth
+        self.stats.nodes_by_ply[0] += 1
+        best_moves = []
+        best_score = float('-inf')
+        scores = {}
 
-            # Make the move on a copy
-            new_board = [row[:] for row in board]
-            new_orange_cats = orange_cats
-            new_black_cats = black_cats
+        for move in moves:
+            score = self.search_root_move(state, move, depth, alpha, beta, best_score)
+            scores[move] = score
+            if score == best_score:
+                best_moves.append(move)
+            elif score > best_score:
+                best_score = score
+                best_moves = [move]
+            if best_score >= beta:
+                break
+
+        return best_moves, best_score, scores
+
+    # Split the root moves across the worker processes. Every worker publishes its score to a shared bound
+    # and starts each move with the window narrowed to the best score any worker has found so far, so later
+    # moves still get pruned. Returns the same as search_root: moves tied for the best score are always
+    # searched exactly, so the result matches the serial search. Each worker also sends back its table entry
+    # for the position after its move, so this AI's own table knows the opponent's best replies, as it would
+    # after a serial search (see expected_move).
+    def parallel_search_root(self, state, moves, depth, alpha=float('-inf'), beta=float('inf')):
+        if self.pool is None:
+            self.shared_bound = multiprocessing.Value('d', float('-inf'))
+            self.shared_stop = multiprocessing.Value('b', False)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_search_worker,
+                                            initargs=(self.tt_size_mb, self.shared_bound, self.shared_stop,
+                                                      self.batch_leaves, self.quiescence_nodes))
+        with self.shared_bound.get_lock():
+            self.shared_bound.value = float('-inf')
+        self.shared_stop.value = False
+        self.search_id += 1
+        self.stats.nodes_by_ply[0] += 1
+
+        # Workers can't share perf_counter(), so the deadline goes over as wall clock time. A stop() made while
+        # the workers are busy reaches them through the shared stop flag within STOP_POLL_SECONDS.
+        stop_time = min((t for t in (self.deadline, self.stop_time) if t is not None), default=None)
+        deadline = None
+        if stop_time is not None:
+            if time.perf_counter() > stop_time:
+                raise SearchTimeout()
+            deadline = time.time() + (stop_time - time.perf_counter())
+
+        futures = [self.pool.submit(_search_root_move, self.search_id, state.board, state.orange_cats,
+                                    state.black_cats, state.current_player, state.trios_clean, state.key,
+                                    move, depth, alpha, beta, deadline)
+                   for move in moves]
+
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=STOP_POLL_SECONDS)
+            if pending and self.out_of_time():
+                self.shared_stop.value = True
+
+        best_moves = []
+        best_score = float('-inf')
+        scores = {}
+        timed_out = False
+        for move, future in zip(moves, futures):
+            result = future.result()
+            if result is None:
+                timed_out = True
+                continue
+            score, worker_stats, reply_entry = result
+            self.stats.merge(worker_stats)
+            if reply_entry is not None: # The worker's entry for the position after the move
+                self.tt.store(*reply_entry[:5])
+            scores[move] = score
+            if score == best_score:
+                best_moves.append(move)
+            elif score > best_score:
+                best_score = score
+                best_moves = [move]
+        if timed_out:
+            raise SearchTimeout()
+
+        return best_moves, best_score, scores
+
+    # The move the last searches expect the player to move to make here (the transposition table's best move
+    # for the position), or None if the position wasn't searched deep enough to have one
+    def expected_move(self, board, orange_cats, black_cats, current_player_idx):
+        entry = self.tt.probe(compute_key(board, orange_cats, black_cats, current_player_idx))
+        if entry is None or entry[4] is None:
+            return None
+        if not self.game.is_legal_move(*entry[4], current_player_idx, board, orange_cats, black_cats):
+            return None
+        return entry[4]
+
+    # True once the search has to give up: its deadline or the time set by stop() has passed, or (in a worker
+    # process) the parent has raised the shared stop flag
+    def out_of_time(self):
+        return (self.deadline is not None and time.perf_counter() > self.deadline) or \
+            (self.stop_time is not None and time.perf_counter() > self.stop_time) or \
+            (self.stop_flag is not None and self.stop_flag.value)
+
+    # True once the time set by stop() has passed
+    def stopped(self):
+        return self.stop_time is not None and time.perf_counter() > self.stop_time
+
+    # Make a search running in another thread give up after seconds (at once by default). A time-limited search
+    # still returns the best moves of the deepest iteration it finished; a fixed-depth search returns the move
+    # ordering's first choice. The stop stays in force for later searches until stop_time is set back to None.
+    def stop(self, seconds=0.0):
+        self.stop_time = time.perf_counter() + seconds
+
+    # Shut down the worker processes, if any were started
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    # Clear per-search move ordering state and age the transposition table
+    def reset_search(self):
+        self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        self.history = {}
+
+    # Run one root search and record its time and node count in the stats (with best_score for orange, like
+    # eval_board). With a guess at the score (the previous iteration's) the search starts with an aspiration
+    # window of ASPIRATION_WINDOW around it, which prunes more, and searches again with the window opened on
+    # the side the score fell outside of it.
+    def timed_search_root(self, search_root, state, moves, depth, guess=None):
+        start = time.perf_counter()
+        nodes_before = self.stats.nodes()
+        alpha, beta = float('-inf'), float('inf')
+        if guess is not None and abs(guess) < WIN_SCORE:
+            alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+        try:
+            while True:
+                best_moves, best_score, scores = search_root(state, moves, depth, alpha, beta)
+                if best_score <= alpha:
+                    alpha = float('-inf')
+                elif best_score >= beta:
+                    beta = float('inf')
+                else:
+                    break
+                self.stats.aspiration_researches += 1
+        except SearchTimeout:
+            self.stats.add_iteration(depth, time.perf_counter() - start, self.stats.nodes() - nodes_before, None,
+                                     completed=False)
+            raise
+        color = 1 if state.current_player == 0 else -1
+        self.stats.add_iteration(depth, time.perf_counter() - start, self.stats.nodes() - nodes_before,
+                                 color * best_score)
+        return best_moves, best_score, scores
 
-            my_color = PieceColor.ORANGE if current_player_idx == 0 else PieceColor.BLACK
-            new_board[y][x] = Piece(piece_type, my_color)
+    # Get the best move for AI
+    # With a time limit (seconds, passed here or set on the AI) the search deepens 1, 2, 3, ... until the time
+    # runs out and returns the best move of the deepest search that finished. Otherwise it searches to self.depth.
+    # The search's statistics are left in self.stats (and logged if stats_log is set); with_stats=True
+    # returns (move, stats) instead of just the move.
+    def get_best_move(self, board, orange_cats, black_cats, current_player_idx, time_limit=None, with_stats=False):
+        self.stats = SearchStats(MAX_SEARCH_DEPTH + 2)
+        start = time.perf_counter()
+        best_move = None
+        if self.book is not None:
+            best_move = self.book.lookup(board, orange_cats, black_cats, current_player_idx)
+            self.stats.book_move = best_move is not None
+        if time_limit is None:
+            time_limit = self.time_limit
+        if best_move is None and self.solver is not None:
+            position = BitBoard.from_board(board, orange_cats, black_cats)
+            if has_win_threat(position, current_player_idx):
+                best_move = self.solve_win(position, board, orange_cats, black_cats, current_player_idx,
+                                           time_limit, start)
+        if best_move is None:
+            # Whatever time the solver used comes out of the search's time
+            if time_limit is not None:
+                time_limit = max(time_limit - (time.perf_counter() - start), 0.0)
+            # Choose randomly among moves with the same best score to add variety
+            best_moves = self.search_best_moves(board, orange_cats, black_cats, current_player_idx, time_limit)
+            best_move = random.choice(best_moves) if best_moves else None
+        self.stats.seconds = time.perf_counter() - start
+        self.stats.best_move = best_move
+        if self.stats_log is not None:
+            self.stats.log_json(self.stats_log)
+
+        if with_stats:
+            return best_move, self.stats
+        return best_move
+
+    # The first move of a forced win for the player to move, or None if none was proven. A win in one move is
+    # played without the solver. Otherwise the solver runs until its node budget is used up, the search is
+    # stopped, or (for a time-limited move started at start) SOLVER_TIME_SHARE of time_limit has passed.
+    def solve_win(self, position, board, orange_cats, black_cats, current_player_idx, time_limit, start):
+        move = winning_move(position, current_player_idx)
+        if move is not None:
+            self.stats.solver_line = [move]
+            return move
+
+        solver_deadline = None if time_limit is None else start + SOLVER_TIME_SHARE * time_limit
+        def stop():
+            return self.stopped() or (solver_deadline is not None and time.perf_counter() > solver_deadline)
+
+        result = self.solver.solve(board, orange_cats, black_cats, current_player_idx, stop)
+        self.stats.solver_nodes = result['nodes']
+        if not result['win']:
+            return None
+        self.stats.solver_line = result['line']
+        return result['line'][0]
+
+    # Search the position and return every move tied for the best score (None if there are no moves)
+    def search_best_moves(self, board, orange_cats, black_cats, current_player_idx, time_limit=None):
+        if time_limit is None:
+            time_limit = self.time_limit
 
-            if piece_type == PieceType.CAT:
-                if current_player_idx == 0:
-                    new_orange_cats -= 1
-                else:
-                    new_black_cats -= 1
-
-            # Apply booping
-            self.game.check_boop(x, y, new_board)
-
-            # Check for three in a row
-            three_result = self.game.first_three_in_row(current_player_idx, new_board)
-            if three_result['found']:
-                for px, py in three_result['positions']:
-                    new_board[py][px] = None
-                if current_player_idx == 0:
-                    new_orange_cats += 3
-                else:
-                    new_black_cats += 3
-            
-            # Evaluate this move (recursive call for the opponent)
-            # If current_player_idx is 0 (Orange, maximizing), the next player is 1 (Black, minimizing).
-            # So, for the recursive call, the maximizing_player flag should be False.
-            # If current_player_idx is 1 (Black, minimizing), the next player is 0 (Orange, maximizing).
-            # So, for the recursive call, the maximizing_player flag should be True.
-            score = self.minimax(new_board, new_orange_cats, new_black_cats,
-                                 self.depth - 1, float('-inf'), float('inf'),
-                                 not maximizing_player, 1 - current_player_idx)
-
-            if maximizing_player:
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-            else: # Minimizing player
-                if score < best_score:
-                    best_score = score
-                    best_move = move
-        
-        return best_move
\ No newline at end of file
+        moves = self.get_possible_moves(current_player_idx, board, orange_cats, black_cats)
+        if not moves:
+            return None
+
+        # Search works on its own copy of the board. Trios can be left on the board (e.g. booped into place
+        # by the opponent), so check the whole root once.
+        state = GameState(board, orange_cats, black_cats, current_player_idx,
+                          trios_clean=not self.game.trio_on_board(board),
+                          key=compute_key(board, orange_cats, black_cats, current_player_idx))
+
+        self.reset_search()
+        search_root = self.parallel_search_root if self.workers > 1 else self.search_root
+
+        # Order the root moves like any other node
+        entry = self.tt.probe(state.key)
+        self.order_moves(board, moves, current_player_idx, entry[4] if entry is not None else None, 0)
+
+        if time_limit is None:
+            try:
+                best_moves, _, _ = self.timed_search_root(search_root, state, moves, self.depth)
+            except SearchTimeout: # Stopped (see stop) before the search finished: play the first ordered move
+                best_moves = moves[:1]
+            return best_moves
+
+        # Iterative deepening. Each iteration searches the root moves best-first by the previous iteration's
+        # scores, with an aspiration window around its best score, and the transposition table hands every inner
+        # node its previous best move to try first.
+        best_moves = moves[:1]
+        best_score = None
+        self.deadline = time.perf_counter() + time_limit
+        try:
+            for depth in range(1, MAX_SEARCH_DEPTH + 1):
+                best_moves, best_score, scores = self.timed_search_root(search_root, state, moves, depth,
+                                                                        best_score)
+                moves.sort(key=scores.__getitem__, reverse=True)
+                if abs(best_score) >= WIN_SCORE: # Forced win or loss found, deeper search won't change it
+                    break
+        except SearchTimeout:
+            pass # The unfinished iteration is thrown away; state is a private copy so it can be dropped too
+        finally:
+            self.deadline = None
+
+        return best_moves
+
+
+# The opening book is read once per process and shared by every BoopAI
+_book = None
+_book_loaded = False
+
+def _default_book():
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book = OpeningBook.load()
+        _book_loaded = True
+    return _book
+
+
+# Parallel root search workers. Each worker process keeps one BoopAI (with its own transposition table)
+# for its whole life, so its table stays warm across moves and searches.
+_worker_ai = None
+_worker_bound = None
+_worker_search_id = None
+
+def _init_search_worker(tt_size_mb, shared_bound, shared_stop, batch_leaves, quiescence_nodes):
+    global _worker_ai, _worker_bound
+    from rules import BoopRules
+    _worker_ai = BoopAI(BoopRules(), 1, tt_size_mb, batch_leaves=batch_leaves, use_book=False, solver_nodes=0,
+                        quiescence_nodes=quiescence_nodes)
+    _worker_ai.stop_flag = shared_stop
+    _worker_bound = shared_bound
+
+# Search one root move in a worker. Returns its score, the search's SearchStats and the transposition table
+# entry for the position after the move (or None), or None if the deadline passed or the parent raised the
+# stop flag first.
+def _search_root_move(search_id, board, orange_cats, black_cats, player_idx, trios_clean, key,
+                      move, depth, alpha, beta, deadline):
+    global _worker_search_id
+    ai = _worker_ai
+    if search_id != _worker_search_id:
+        ai.reset_search()
+        _worker_search_id = search_id
+
+    state = GameState(board, orange_cats, black_cats, player_idx, trios_clean, key)
+    ai.search_depth = depth
+    ai.stats = SearchStats(MAX_SEARCH_DEPTH + 2)
+    if deadline is not None:
+        ai.deadline = time.perf_counter() + (deadline - time.time())
+
+    # The shared bound is the best score so far from the mover's point of view, as search_root's best_score
+    try:
+        score = ai.search_root_move(state, move, depth, alpha, beta, _worker_bound.value)
+    except SearchTimeout:
+        return None
+    finally:
+        ai.deadline = None
+
+    # A score at or below alpha is only a bound, so it isn't shared
+    with _worker_bound.get_lock():
+        if alpha < score and score > _worker_bound.value:
+            _worker_bound.value = score
+
+    undo = ai.apply_move(state, move)
+    reply_entry = ai.tt.probe(state.key)
+    ai.undo_move(state, undo)
+    return score, ai.stats, reply_entry
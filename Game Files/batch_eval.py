@@ -0,0 +1,81 @@
+# Vectorized evaluation of many leaf positions at once with NumPy. Most nodes in a minimax tree are leaves,
+# and scoring them one at a time with BoopAI.eval_board walks the 6x6 grid in Python for each one. Here the
+# leaves are stacked into an (N, 6, 6) int8 array and material, on-board cats and win flags are computed for
+# all of them in a few array operations.
+# evaluate_boards gives the same scores the search gives a leaf, so if eval_board changes, change it here too.
+
+import numpy as np
+from constants import BOARD_SIZE
+from pieces import PieceType, PieceColor, get_piece
+from rules import THREE_IN_ROW_LINES
+
+WIN_SCORE = 10000
+
+# Cell codes in an encoded board
+EMPTY = 0
+ORANGE_KITTEN = 1
+ORANGE_CAT = 2
+BLACK_KITTEN = 3
+BLACK_CAT = 4
+
+# Code for each piece (and None for an empty cell)
+PIECE_CODES = {
+    None: EMPTY,
+    get_piece(PieceType.KITTEN, PieceColor.ORANGE): ORANGE_KITTEN,
+    get_piece(PieceType.CAT, PieceColor.ORANGE): ORANGE_CAT,
+    get_piece(PieceType.KITTEN, PieceColor.BLACK): BLACK_KITTEN,
+    get_piece(PieceType.CAT, PieceColor.BLACK): BLACK_CAT,
+}
+
+# LINE_CELLS[i] holds the flat cell indices (y * BOARD_SIZE + x) of THREE_IN_ROW_LINES[i]
+LINE_CELLS = np.array([[y * BOARD_SIZE + x for x, y in line] for line in THREE_IN_ROW_LINES], dtype=np.intp)
+
+
+# Flat list of the 36 cell codes of a list-of-lists board, row by row
+def encode_cells(board):
+    return [PIECE_CODES[piece] for row in board for piece in row]
+
+
+# Stack list-of-lists boards into an (N, 6, 6) int8 array
+def encode_boards(boards):
+    encoded = np.array([encode_cells(board) for board in boards], dtype=np.int8)
+    return encoded.reshape(len(boards), BOARD_SIZE, BOARD_SIZE)
+
+
+# Features of N encoded boards (any shape that reshapes to (N, 36)), each an array of length N:
+# piece counts and win flags
+def board_features(boards):
+    cells = np.asarray(boards, dtype=np.int8).reshape(-1, BOARD_SIZE * BOARD_SIZE)
+    lines = cells[:, LINE_CELLS] # (N, lines, 3)
+
+    orange_kittens = np.count_nonzero(cells == ORANGE_KITTEN, axis=1)
+    orange_cats = np.count_nonzero(cells == ORANGE_CAT, axis=1)
+    black_kittens = np.count_nonzero(cells == BLACK_KITTEN, axis=1)
+    black_cats = np.count_nonzero(cells == BLACK_CAT, axis=1)
+
+    # A player wins with 8 cats on the board or three cats in a row
+    orange_won = (orange_cats >= 8) | np.all(lines == ORANGE_CAT, axis=2).any(axis=1)
+    black_won = (black_cats >= 8) | np.all(lines == BLACK_CAT, axis=2).any(axis=1)
+
+    return {
+        'orange_kittens': orange_kittens,
+        'orange_cats': orange_cats,
+        'black_kittens': black_kittens,
+        'black_cats': black_cats,
+        'orange_won': orange_won,
+        'black_won': black_won
+    }
+
+
+# Scores of N encoded boards with the given reserve cats (arrays of length N), where bigger = better for
+# orange. A won position scores +/-WIN_SCORE; black's win is checked first, like the search's terminal check.
+def evaluate_boards(boards, orange_cats, black_cats):
+    features = board_features(boards)
+    orange_reserve = np.asarray(orange_cats, dtype=np.int64)
+    black_reserve = np.asarray(black_cats, dtype=np.int64)
+
+    score = (4 * features['orange_cats'] + 2 * orange_reserve + features['orange_kittens']) - \
+        (4 * features['black_cats'] + 2 * black_reserve + features['black_kittens'])
+    score = np.where(features['orange_won'], WIN_SCORE, score)
+    score = np.where(features['black_won'], -WIN_SCORE, score)
+    return score
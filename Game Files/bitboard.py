@@ -0,0 +1,241 @@
+# This class is a bitboard version of the board and rules, for code that plays through many positions:
+# perft, the MCTS playouts (mcts.py) and the forced-win solver (pn_search.py).
+# Each (color, type) pair is a 36-bit integer with bit (y * BOARD_SIZE + x) set when that
+# cell holds such a piece, so copying a position is copying four ints and most rule
+# checks become a handful of AND/OR operations instead of walking the 6x6 grid.
+#
+# BoopAI's negamax search does not use it. It searches the list-of-lists board in place (see
+# BoopAI.apply_move), because eval_board, the heuristic meant to be replaced, and the move ordering,
+# quiescence search and batch_eval all read that board, and rule checks go through the game instance.
+# The rules here must match BoopRules: "python perft.py [depth] bitboard" checks them against the same
+# reference counts as the list-of-lists rules.
+
+from pieces import PieceType, PieceColor, get_piece
+from constants import BOARD_SIZE
+from rules import THREE_IN_ROW_LINES
+
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+FULL_MASK = (1 << NUM_CELLS) - 1
+
+# Index into BitBoard.pieces is 2 * player_idx + piece type value
+ORANGE_KITTEN = 0
+ORANGE_CAT = 1
+BLACK_KITTEN = 2
+BLACK_CAT = 3
+
+# Shared Piece instance for each index, and the reverse lookup
+INDEX_PIECES = tuple(get_piece(piece_type, color)
+                     for color in (PieceColor.ORANGE, PieceColor.BLACK)
+                     for piece_type in (PieceType.KITTEN, PieceType.CAT))
+PIECE_INDEX = {piece: idx for idx, piece in enumerate(INDEX_PIECES)}
+
+# Boop directions in the same order BoopRules.check_boop walks them
+BOOP_DIRECTIONS = [(dx, dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1] if not (dx == 0 and dy == 0)]
+
+
+
+def cell_index(x, y):
+    return y * BOARD_SIZE + x
+
+
+def cell_coords(cell):
+    return cell % BOARD_SIZE, cell // BOARD_SIZE
+
+
+# Moves stored as one small int: cell * 2 + 1 for a cat, cell * 2 for a kitten
+def encode_move(x, y, piece_type):
+    return cell_index(x, y) * 2 + (1 if piece_type == PieceType.CAT else 0)
+
+
+def decode_move(code):
+    x, y = cell_coords(code // 2)
+    return (x, y, PieceType.CAT if code & 1 else PieceType.KITTEN)
+
+
+def _build_boop_table():
+    # For each cell, a list of (neighbor cell, push destination cell or -1 if off board)
+    table = []
+    for cell in range(NUM_CELLS):
+        x, y = cell_coords(cell)
+        entries = []
+        for dx, dy in BOOP_DIRECTIONS:
+            tx, ty = x + dx, y + dy
+            if not (0 <= tx < BOARD_SIZE and 0 <= ty < BOARD_SIZE):
+                continue
+            px, py = tx + dx, ty + dy
+            if 0 <= px < BOARD_SIZE and 0 <= py < BOARD_SIZE:
+                entries.append((cell_index(tx, ty), cell_index(px, py)))
+            else:
+                entries.append((cell_index(tx, ty), -1))
+        table.append(entries)
+    return table
+
+
+BOOP_TABLE = _build_boop_table()
+
+# THREE_IN_ROW_LINES as masks, in the same order so the first match is the trio the rules pick
+TRIO_MASKS = [sum(1 << cell_index(x, y) for x, y in line) for line in THREE_IN_ROW_LINES]
+
+
+# Returns the list of cells set in a mask, lowest cell first
+def mask_cells(mask):
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+class BitBoard:
+    __slots__ = ('pieces', 'orange_cats', 'black_cats')
+
+    def __init__(self, pieces=None, orange_cats=0, black_cats=0):
+        self.pieces = list(pieces) if pieces is not None else [0, 0, 0, 0]
+        self.orange_cats = orange_cats
+        self.black_cats = black_cats
+
+    # Build a bitboard from the list-of-lists board used by BoopRules
+    @classmethod
+    def from_board(cls, board, orange_cats, black_cats):
+        pieces = [0, 0, 0, 0]
+        for y in range(BOARD_SIZE):
+            for x in range(BOARD_SIZE):
+                piece = board[y][x]
+                if piece is not None:
+                    pieces[PIECE_INDEX[piece]] |= 1 << cell_index(x, y)
+        return cls(pieces, orange_cats, black_cats)
+
+    # Convert back to the list-of-lists board used by BoopRules
+    def to_board(self):
+        board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        for idx in range(4):
+            for cell in mask_cells(self.pieces[idx]):
+                x, y = cell_coords(cell)
+                board[y][x] = INDEX_PIECES[idx]
+        return board
+
+    def copy(self):
+        return BitBoard(self.pieces, self.orange_cats, self.black_cats)
+
+    def __eq__(self, other):
+        if not isinstance(other, BitBoard):
+            return NotImplemented
+        return (self.pieces == other.pieces and self.orange_cats == other.orange_cats and
+                self.black_cats == other.black_cats)
+
+    def __repr__(self):
+        return f"BitBoard({[hex(p) for p in self.pieces]}, {self.orange_cats}, {self.black_cats})"
+
+    def occupied(self):
+        pieces = self.pieces
+        return pieces[0] | pieces[1] | pieces[2] | pieces[3]
+
+    # Index into self.pieces of the piece on a cell, or -1 if empty
+    def piece_at(self, cell):
+        bit = 1 << cell
+        for idx in range(4):
+            if self.pieces[idx] & bit:
+                return idx
+        return -1
+
+    def reserve_cats(self, player_idx):
+        return self.orange_cats if player_idx == 0 else self.black_cats
+
+    # Get all possible moves for a player, in the same order as BoopAI.get_possible_moves
+    def get_possible_moves(self, player_idx):
+        empty = ~self.occupied() & FULL_MASK
+        has_cats = self.reserve_cats(player_idx) > 0
+        moves = []
+        for cell in mask_cells(empty):
+            x, y = cell_coords(cell)
+            moves.append((x, y, PieceType.KITTEN))
+            if has_cats:
+                moves.append((x, y, PieceType.CAT))
+        return moves
+
+    # Put a piece of the given type for the player on an empty cell and use up a reserve cat if needed
+    def place_piece(self, cell, player_idx, piece_type):
+        self.pieces[2 * player_idx + piece_type.value] |= 1 << cell
+        if piece_type == PieceType.CAT:
+            if player_idx == 0:
+                self.orange_cats -= 1
+            else:
+                self.black_cats -= 1
+
+    # Boop the neighbors of the piece just placed on a cell.
+    # Returns a list of (from cell, to cell or -1 if booped off, piece index) for each piece moved.
+    def check_boop(self, placed_cell):
+        pieces = self.pieces
+        placed_idx = self.piece_at(placed_cell)
+        if placed_idx < 0:
+            return []
+        placed_is_cat = placed_idx & 1
+        occupied = pieces[0] | pieces[1] | pieces[2] | pieces[3]
+
+        moves_made = []
+        for target, dest in BOOP_TABLE[placed_cell]:
+            target_bit = 1 << target
+            if not occupied & target_bit:
+                continue
+            for idx in range(4):
+                if pieces[idx] & target_bit:
+                    break
+            # A kitten cannot boop cats
+            if not placed_is_cat and idx & 1:
+                continue
+            if dest < 0:
+                pieces[idx] ^= target_bit
+                occupied ^= target_bit
+                moves_made.append((target, -1, idx))
+            elif not occupied & (1 << dest):
+                dest_bit = 1 << dest
+                pieces[idx] ^= target_bit | dest_bit
+                occupied ^= target_bit | dest_bit
+                moves_made.append((target, dest, idx))
+        return moves_made
+
+    # Mask of the trio BoopRules.first_three_in_row would choose for the player (at least one kitten), or 0
+    def first_three_in_row(self, player_idx):
+        kittens = self.pieces[2 * player_idx]
+        owned = kittens | self.pieces[2 * player_idx + 1]
+        if not kittens or owned.bit_count() < 3:
+            return 0
+        for mask in TRIO_MASKS:
+            if owned & mask == mask and kittens & mask:
+                return mask
+        return 0
+
+    # Remove a trio from the board and give its owner three cats
+    def graduate_trio(self, player_idx, mask):
+        self.pieces[2 * player_idx] &= ~mask
+        self.pieces[2 * player_idx + 1] &= ~mask
+        if player_idx == 0:
+            self.orange_cats += 3
+        else:
+            self.black_cats += 3
+
+    # True if the player has 8 cats on the board or three cats in a row
+    def player_won(self, player_idx):
+        cats = self.pieces[2 * player_idx + 1]
+        num_cats = cats.bit_count()
+        if num_cats >= 8:
+            return True
+        if num_cats < 3:
+            return False
+        for mask in TRIO_MASKS:
+            if cats & mask == mask:
+                return True
+        return False
+
+    # Apply a full move (placement, boops, trio graduation) in place.
+    # Returns the boop list from check_boop and the graduated trio mask (0 if none).
+    def apply_move(self, move, player_idx):
+        x, y, piece_type = move
+        cell = cell_index(x, y)
+        self.place_piece(cell, player_idx, piece_type)
+        boops = self.check_boop(cell)
+        trio = self.first_three_in_row(player_idx)
+        if trio:
+            self.graduate_trio(player_idx, trio)
+        return boops, trio
@@ -0,0 +1,128 @@
+# Opening book: the best moves for early-game positions, found once by deep offline searches and looked up
+# by BoopAI instead of searching those positions again every game. Positions are stored under their canonical
+# key (see symmetry.py), so the 8 rotations and reflections of a position share one entry, and moves are
+# stored in the canonical orientation and mapped back on lookup.
+#
+# The book file is a short header followed by one record per position: the 64-bit canonical key, the number
+# of moves, then one byte per move (see encode_move in bitboard.py).
+#
+# Build with: python book.py [plies] [depth] [seconds_per_position] [output file]
+# Every position up to plies moves into the game is searched to depth (or for seconds_per_position if given).
+
+import os
+import random
+import struct
+import sys
+import time
+from pieces import GameState
+from constants import BOARD_SIZE
+from rules import BoopRules
+from zobrist import compute_key
+from symmetry import canonical_key, transform_move, untransform_move
+from bitboard import encode_move, decode_move
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+BOOK_MAGIC = b'BOOPBOOK1\n'
+RECORD_HEADER = struct.Struct('<QB') # canonical key, number of moves
+
+
+class OpeningBook:
+    def __init__(self, entries=None):
+        self.entries = entries if entries is not None else {} # canonical key -> list of canonical move codes
+        self.rules = BoopRules()
+
+    # Load a book file; returns None if there is no file at path
+    @classmethod
+    def load(cls, path=BOOK_FILE):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(BOOK_MAGIC):
+            raise ValueError(f"{path} is not an opening book")
+
+        entries = {}
+        offset = len(BOOK_MAGIC)
+        while offset < len(data):
+            key, count = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            entries[key] = list(data[offset:offset + count])
+            offset += count
+        return cls(entries)
+
+    def save(self, path=BOOK_FILE):
+        with open(path, 'wb') as f:
+            f.write(BOOK_MAGIC)
+            for key in sorted(self.entries):
+                codes = self.entries[key]
+                f.write(RECORD_HEADER.pack(key, len(codes)))
+                f.write(bytes(codes))
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Record the best moves (equally good, as (x, y, piece_type)) for a position
+    def add(self, board, orange_cats, black_cats, current_player_idx, moves):
+        key, t = canonical_key(board, orange_cats, black_cats, current_player_idx)
+        self.entries[key] = sorted({encode_move(*transform_move(move, t)) for move in moves})
+
+    # A book move for the position (chosen at random among equally good ones), or None if it isn't in the book
+    def lookup(self, board, orange_cats, black_cats, current_player_idx):
+        key, t = canonical_key(board, orange_cats, black_cats, current_player_idx)
+        codes = self.entries.get(key)
+        if not codes:
+            return None
+        move = untransform_move(decode_move(random.choice(codes)), t)
+        if not self.rules.is_legal_move(*move, current_player_idx, board, orange_cats, black_cats):
+            return None
+        return move
+
+
+# Search every position up to plies moves into the game, starting from the empty board, and return the book.
+# Positions that are rotations or reflections of one already searched are skipped.
+def build_book(plies, depth, time_limit=None, verbose=True):
+    from ai import BoopAI
+    rules = BoopRules()
+    ai = BoopAI(rules, depth, time_limit=time_limit, use_book=False)
+    book = OpeningBook()
+
+    board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    frontier = [GameState(board, 0, 0, 0, trios_clean=True, key=compute_key(board, 0, 0, 0))]
+    for ply in range(plies):
+        next_frontier = []
+        seen = set()
+        start = time.perf_counter()
+        for state in frontier:
+            board, orange_cats, black_cats, player_idx = state.board, state.orange_cats, state.black_cats, \
+                state.current_player
+            best_moves = ai.search_best_moves(board, orange_cats, black_cats, player_idx)
+            if best_moves:
+                book.add(board, orange_cats, black_cats, player_idx, best_moves)
+            if ply + 1 == plies:
+                continue
+
+            # Every reply leads to a position for the next ply, once per symmetry class
+            for move in ai.get_possible_moves(player_idx, board, orange_cats, black_cats):
+                child = state.copy()
+                ai.apply_move(child, move)
+                if rules.player_won(player_idx, child.board, child.orange_cats, child.black_cats):
+                    continue
+                key, _ = canonical_key(child.board, child.orange_cats, child.black_cats, child.current_player)
+                if key not in seen and key not in book.entries:
+                    seen.add(key)
+                    next_frontier.append(child)
+        if verbose:
+            print(f"Ply {ply}: searched {len(frontier)} positions in {time.perf_counter() - start:.1f}s")
+        frontier = next_frontier
+    return book
+
+
+if __name__ == "__main__":
+    plies = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    time_limit = float(sys.argv[3]) if len(sys.argv) > 3 and float(sys.argv[3]) > 0 else None
+    output = sys.argv[4] if len(sys.argv) > 4 else BOOK_FILE
+
+    book = build_book(plies, depth, time_limit)
+    book.save(output)
+    print(f"Wrote {len(book)} positions to {output} ({os.path.getsize(output):,} bytes)")
@@ -1,24 +1,40 @@
 # This class implements the networking/logic portion of an AI-playing client.
 # The AI algorithmic portion is in the ai.py file.
 #
-# run with:  python client_ai.py <host> <port> <lookahead_depth>
+# run with:  python client_ai.py <host> <port> <lookahead_depth> [seconds_per_move] [workers] [stats_log] [ponder]
+#                              [max_seconds_per_move]
 #
-# The default host is localhost, 5555, with lookahead 2
+# The default host is localhost, 5555, with lookahead 2. If seconds_per_move is given (and not 0) the AI
+# ignores the lookahead depth and searches as deep as it can in that time. workers is the number of
+# processes to split the search across (default 1). If stats_log is given (use - for none) each search's
+# statistics are appended to that file as a line of JSON. If ponder is 1 the AI keeps thinking during the
+# opponent's turn. max_seconds_per_move is a hard limit on any one search; a fixed-depth search that runs
+# out of time plays the best move it has.
+#
+# All searches run one at a time on a single SearchWorker thread (see search_worker.py). A new game state
+# cancels whatever search is running, so only the latest state is ever searched.
 #
 import socket
 import json
 import time
 import threading
-from pieces import PieceType, PieceColor, Piece
+from pieces import PieceType, PieceColor, GameState, get_piece
 from constants import BOARD_SIZE
 from ai import BoopAI
-from game import BoopGame
+from rules import BoopRules
+from zobrist import compute_key
+from search_worker import SearchWorker
 
 class AIClient:
-    def __init__(self, host='localhost', port=5555, depth=2):
+    def __init__(self, host='localhost', port=5555, depth=2, time_limit=None, workers=1, stats_log=None,
+                 ponder=False, move_deadline=None):
         self.host = host
         self.port = port
         self.depth = depth
+        self.time_limit = time_limit
+        self.workers = workers
+        self.ponder = ponder
+        self.move_deadline = move_deadline
         self.socket = None
         self.player_idx = None
         self.my_color = None
@@ -30,9 +46,20 @@ class AIClient:
         self.black_cats = 0
         self.win_msg = ""
         
-        # Create a dummy game instance for AI to use for rule checking
-        self.game = BoopGame(ai_depth=depth)
-        self.ai = BoopAI(self.game, depth)
+        # Headless rules instance for the AI to use for rule checking
+        self.game = BoopRules()
+        self.ai = BoopAI(self.game, depth, time_limit=time_limit, workers=workers, stats_log=stats_log)
+        self.worker = SearchWorker(self.ai) # The one thread every search runs on
+        self.search_position = None # (board, orange_cats, black_cats) our move is being searched for
+        self.move_start = None
+
+        # Pondering (searching during the opponent's turn). The lock guards these against the worker thread.
+        self.ponder_lock = threading.Lock()
+        self.ponder_serial = 0 # Counts ponder searches, so a finished search can tell if it is still current
+        self.ponder_job = None # Worker job id of the current ponder search
+        self.ponder_position = None # (board, orange_cats, black_cats) the ponder search is finding our move for
+        self.ponder_result = None # (move, stats) once the ponder search finishes
+        self.ponder_adopted = False # True once the opponent played the expected move: the result is our move
         
         self.running = True
         self.connected = False
@@ -87,7 +114,12 @@ class AIClient:
             self.player_idx = message.get('player_idx')
             self.my_color = message.get('color')
             print(f"Assigned as Player {self.player_idx} ({self.my_color})")
-            print(f"Using Minimax AI with depth {self.depth}")
+            if self.time_limit is not None:
+                print(f"Using Minimax AI with {self.time_limit}s per move")
+            else:
+                print(f"Using Minimax AI with depth {self.depth}")
+            if self.ponder:
+                print("Pondering during the opponent's turn")
             
         elif msg_type == 'game_state':
             # Update game state
@@ -97,14 +129,17 @@ class AIClient:
             # Make a move if it's our turn
             if self.whoseturn == self.player_idx and not self.win_msg:
                 print(f"It's my turn! Computing move...")
-                # Run AI computation in a separate thread to avoid blocking
-                ai_thread = threading.Thread(target=self.compute_and_send_move)
-                ai_thread.start()
+                # The search runs on the worker thread, so this thread keeps reading messages
+                self.start_move_search()
             else:
+                self.search_position = None
                 if self.win_msg:
                     print(f"Game over: {self.win_msg}")
+                    self.worker.cancel()
                 else:
                     print(f"Waiting for opponent (Player {self.whoseturn})")
+                    if self.ponder and self.player_idx is not None:
+                        self.start_pondering()
             
         elif msg_type == 'error':
             print(f"Error from server: {message.get('message')}")
@@ -121,31 +156,100 @@ class AIClient:
                 else:
                     piece_type = PieceType.KITTEN if piece_data['type'] == 'KITTEN' else PieceType.CAT
                     piece_color = PieceColor.ORANGE if piece_data['color'] == 'ORANGE' else PieceColor.BLACK
-                    self.board[y][x] = Piece(piece_type, piece_color)
+                    self.board[y][x] = get_piece(piece_type, piece_color)
         
         self.whoseturn = state.get('whoseturn', 0)
         self.orange_cats = state.get('orange_cats', 0)
         self.black_cats = state.get('black_cats', 0)
         self.win_msg = state.get('win_msg', "")
     
-    def compute_and_send_move(self):
-        """Compute best move using AI and send it"""
+    def start_move_search(self):
+        """Search for our move on the worker, or keep the ponder search if it was searching this position"""
+        position = ([row[:] for row in self.board], self.orange_cats, self.black_cats)
+        if position == self.search_position: # The same state again: its search is already running
+            return
+        self.search_position = position
         print(f"AI ({['Orange', 'Black'][self.player_idx]}) thinking...")
-        start_time = time.time()
-        
-        # Get best move from AI
-        best_move = self.ai.get_best_move(
-            self.board,
-            self.orange_cats,
-            self.black_cats,
-            self.player_idx
-        )
-        
-        elapsed = time.time() - start_time
+        self.move_start = time.time()
+
+        # A ponder hit: a time-limited search gets this move's time on top of the time it has had already,
+        # and a fixed-depth search is left to finish. Either way max_seconds_per_move still caps the move.
+        with self.ponder_lock:
+            hit = self.ponder_job is not None and self.ponder_position == position
+            if hit:
+                print("Opponent played the expected move, continuing the ponder search")
+                self.ponder_adopted = True
+                result = self.ponder_result
+                if result is None:
+                    seconds = min((t for t in (self.time_limit, self.move_deadline) if t is not None), default=None)
+                    if seconds is not None:
+                        self.worker.set_deadline(self.ponder_job, seconds)
+            self.ponder_job = None
+        if hit:
+            if result is not None: # It already finished
+                self.move_found(*result)
+            return
+
+        self.worker.submit(*position, self.player_idx, self.move_found, deadline=self.move_deadline)
+
+    def start_pondering(self):
+        """Start searching on the worker while the opponent thinks"""
+        # The opponent's expected reply is the one our last search found for them. If there is one, search our
+        # answer to it, so the move is ready (or has a head start) if they play it. If not, search their
+        # position, which leaves results for all of their replies in the transposition table.
+        opponent = 1 - self.player_idx
+        board = [row[:] for row in self.board]
+        orange_cats, black_cats = self.orange_cats, self.black_cats
+        ponder_position = None
+        expected = self.ai.expected_move(board, orange_cats, black_cats, opponent)
+        if expected is not None:
+            state = GameState(board, orange_cats, black_cats, opponent,
+                              trios_clean=not self.game.trio_on_board(board),
+                              key=compute_key(board, orange_cats, black_cats, opponent))
+            self.ai.apply_move(state, expected)
+            if not self.game.player_won(opponent, state.board, state.orange_cats, state.black_cats):
+                board, orange_cats, black_cats = state.board, state.orange_cats, state.black_cats
+                ponder_position = (board, orange_cats, black_cats)
+                print(f"Pondering our reply to {expected[2].name} at ({expected[0]}, {expected[1]})")
+        if ponder_position is None:
+            print("Pondering the opponent's move")
+
+        with self.ponder_lock:
+            self.ponder_serial += 1
+            serial = self.ponder_serial
+            self.ponder_position = ponder_position
+            self.ponder_result = None
+            self.ponder_adopted = False
+
+        # A time-limited AI searches with no time limit until it is stopped
+        time_limit = float('inf') if self.time_limit is not None else None
+        player_idx = self.player_idx if ponder_position is not None else opponent
+        job = self.worker.submit(board, orange_cats, black_cats, player_idx,
+                                 lambda move, stats: self.ponder_done(serial, move, stats), time_limit=time_limit)
+        with self.ponder_lock:
+            if serial == self.ponder_serial and ponder_position is not None:
+                self.ponder_job = job
+
+    def ponder_done(self, serial, move, stats):
+        """Worker callback when a ponder search finishes: play its move if the opponent already played the
+        expected move, otherwise keep it for when they do"""
+        with self.ponder_lock:
+            if serial != self.ponder_serial:
+                return
+            self.ponder_result = (move, stats)
+            adopted = self.ponder_adopted
+        if adopted:
+            self.move_found(move, stats)
+
+    def move_found(self, best_move, stats):
+        """Worker callback with the move for our turn: send it"""
+        elapsed = time.time() - self.move_start
         
         if best_move:
             x, y, piece_type = best_move
             print(f"AI chose: {piece_type.name} at ({x}, {y}) [took {elapsed:.2f}s]")
+            if stats is not None:
+                print(f"  Search: {stats.summary()}")
             
             # Add small delay for visual effect
             time.sleep(0.3)
@@ -187,8 +291,10 @@ class AIClient:
             print("\nShutting down...")
         finally:
             self.running = False
+            self.worker.close()
             if self.socket:
                 self.socket.close()
+            self.ai.close()
 
 if __name__ == "__main__":
     import sys
@@ -197,6 +303,11 @@ if __name__ == "__main__":
     host = 'localhost'
     port = 5555
     depth = 2
+    time_limit = None
+    workers = 1
+    stats_log = None
+    ponder = False
+    move_deadline = None
     
     # Parse command line arguments
     if len(sys.argv) > 1:
@@ -212,7 +323,37 @@ if __name__ == "__main__":
             print(f"Using AI depth: {depth}")
         except ValueError:
             print(f"Invalid depth '{sys.argv[3]}', using default: {depth}")
+    if len(sys.argv) > 4:
+        try:
+            time_limit = float(sys.argv[4])
+            if time_limit > 0:
+                print(f"Using AI time limit: {time_limit}s per move")
+            else:
+                time_limit = None
+        except ValueError:
+            print(f"Invalid time limit '{sys.argv[4]}', using fixed depth: {depth}")
+    if len(sys.argv) > 5:
+        try:
+            workers = int(sys.argv[5])
+            print(f"Using {workers} search worker processes")
+        except ValueError:
+            print(f"Invalid worker count '{sys.argv[5]}', using default: {workers}")
+    if len(sys.argv) > 6 and sys.argv[6] != '-':
+        stats_log = sys.argv[6]
+        print(f"Logging search statistics to {stats_log}")
+    if len(sys.argv) > 7:
+        ponder = sys.argv[7] not in ('0', 'false')
+    if len(sys.argv) > 8:
+        try:
+            move_deadline = float(sys.argv[8])
+            if move_deadline > 0:
+                print(f"Stopping any search after {move_deadline}s")
+            else:
+                move_deadline = None
+        except ValueError:
+            print(f"Invalid move time limit '{sys.argv[8]}', using none")
     
     print(f"Connecting to {host}:{port}")
-    client = AIClient(host=host, port=port, depth=depth)
+    client = AIClient(host=host, port=port, depth=depth, time_limit=time_limit, workers=workers,
+                      stats_log=stats_log, ponder=ponder, move_deadline=move_deadline)
     client.run()
\ No newline at end of file
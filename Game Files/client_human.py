@@ -14,7 +14,7 @@ from constants import (
     WHITE, BLACK, GRAY, LIGHT_BLUE, ORANGE, NAVY, BLUE,
     KITTEN_O_SPRITE, CAT_O_SPRITE, KITTEN_B_SPRITE, CAT_B_SPRITE
 )
-from pieces import PieceType, PieceColor, Piece
+from pieces import PieceType, PieceColor, get_piece
 
 class HumanClient:
     def __init__(self, host='localhost', port=5555):
@@ -130,7 +130,7 @@ class HumanClient:
                 else:
                     piece_type = PieceType.KITTEN if piece_data['type'] == 'KITTEN' else PieceType.CAT
                     piece_color = PieceColor.ORANGE if piece_data['color'] == 'ORANGE' else PieceColor.BLACK
-                    self.board[y][x] = Piece(piece_type, piece_color)
+                    self.board[y][x] = get_piece(piece_type, piece_color)
         
         self.whoseturn = state.get('whoseturn', 0)
         self.orange_cats = state.get('orange_cats', 0)
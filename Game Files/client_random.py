@@ -10,7 +10,7 @@ import json
 import random
 import time
 import threading
-from pieces import PieceType, PieceColor, Piece
+from pieces import PieceType, PieceColor, get_piece
 from constants import BOARD_SIZE
 
 class RandomClient:
@@ -113,7 +113,7 @@ class RandomClient:
                 else:
                     piece_type = PieceType.KITTEN if piece_data['type'] == 'KITTEN' else PieceType.CAT
                     piece_color = PieceColor.ORANGE if piece_data['color'] == 'ORANGE' else PieceColor.BLACK
-                    self.board[y][x] = Piece(piece_type, piece_color)
+                    self.board[y][x] = get_piece(piece_type, piece_color)
         
         self.whoseturn = state.get('whoseturn', 0)
         self.orange_cats = state.get('orange_cats', 0)
@@ -1,4 +1,3 @@
-import pygame
 from enum import Enum
 
 # Window and Board
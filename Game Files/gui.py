@@ -3,7 +3,8 @@ import sys
 from constants import (
     WINDOW_WIDTH, WINDOW_HEIGHT, BOARD_SIZE, CELL_SIZE, BOARD_START_X, BOARD_START_Y,
     WHITE, BLACK, GRAY, LIGHT_BLUE, ORANGE, NAVY, BLUE,
-    KITTEN_O_SPRITE, CAT_O_SPRITE, KITTEN_B_SPRITE, CAT_B_SPRITE
+    KITTEN_O_SPRITE, CAT_O_SPRITE, KITTEN_B_SPRITE, CAT_B_SPRITE,
+    KITTEN_MEOW_SOUND, CAT_MEOW_SOUND, BOOP_SOUND, CHEER_SOUND
 )
 from pieces import PieceType, PieceColor, PlayerType
 from game import BoopGame
@@ -28,6 +29,25 @@ class GameGUI:
 
         self.ai_thinking = False # Flag for GUI to show AI thinking message
 
+        # Attach sounds to the game; the game itself runs without pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        self._load_sounds()
+
+    def _load_sounds(self):
+        try:
+            self.game.kitten_meow = pygame.mixer.Sound(KITTEN_MEOW_SOUND)
+            self.game.cat_meow = pygame.mixer.Sound(CAT_MEOW_SOUND)
+            self.game.boop = pygame.mixer.Sound(BOOP_SOUND)
+            self.game.cheer = pygame.mixer.Sound(CHEER_SOUND)
+        except pygame.error as e:
+            print(f"Could not load sound files: {e}. Sounds will not play.")
+            # Leave the game silent if files don't exist
+            self.game.kitten_meow = None
+            self.game.cat_meow = None
+            self.game.boop = None
+            self.game.cheer = None
+
     def _load_sprite(self, path, fallback_color):
         try:
             sprite = pygame.image.load(path).convert_alpha()
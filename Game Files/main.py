@@ -17,8 +17,12 @@ def run_game():
 
     # Configure game settings
     ai_depth_setting = 3 # AI search depth - CHANGE UP to 3 (4 will be slow)
+    ai_time_limit_setting = None # Seconds per AI move, e.g. 2.0 - if set, AI searches as deep as it can in that time instead
+    ai_workers_setting = 1 # Processes to split the AI search across, e.g. os.cpu_count()
+    ai_batch_leaves_setting = False # Score leaf positions in batches with NumPy (needs numpy installed)
 
-    game = BoopGame(ai_depth=ai_depth_setting)
+    game = BoopGame(ai_depth=ai_depth_setting, ai_time_limit=ai_time_limit_setting, ai_workers=ai_workers_setting,
+                    ai_batch_leaves=ai_batch_leaves_setting)
     game.player0 = PlayerType.AI   # Player 0 (Orange) type: HUMAN or AI
     game.player1 = PlayerType.AI   # Player 1 (Black) type: HUMAN or AI
 
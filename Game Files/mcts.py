@@ -0,0 +1,175 @@
+# This class is a Monte Carlo Tree Search (UCT) player, an alternative to the minimax search in ai.py with the
+# same get_best_move interface. Instead of searching every move to a fixed depth it plays many quick games
+# (playouts) from the current position and grows a tree toward the moves that win most often, so it gets
+# stronger the more playouts or time it is given rather than needing exponentially more time per ply.
+# Positions are BitBoards (see bitboard.py) so playouts are fast, and the tree is kept between moves.
+
+import math
+import random
+import time
+from bitboard import BitBoard, FULL_MASK, NUM_CELLS, cell_coords
+from pieces import PieceType
+
+ROLLOUT_LIMIT = 200 # Playouts still going after this many moves count as a draw
+GUIDED_SAMPLES = 4 # Moves a guided playout looks at before picking one
+
+# One position in the search tree
+class MCTSNode:
+    __slots__ = ('state', 'player_idx', 'move', 'parent', 'children', 'untried_moves', 'visits', 'wins', 'winner')
+
+    def __init__(self, state, player_idx, move=None, parent=None, winner=None):
+        self.state = state # BitBoard of the position
+        self.player_idx = player_idx # Player to move here
+        self.move = move # Move that led here from the parent
+        self.parent = parent
+        self.children = []
+        self.untried_moves = None # Filled in the first time the node is expanded
+        self.visits = 0
+        self.wins = 0.0 # Playouts won by the player who made self.move (draws count half)
+        self.winner = winner # Player who has won if this position ends the game, otherwise None
+
+class BoopMCTS:
+    # Search for a fixed number of playouts, or for time_limit seconds if given.
+    # guided playouts pick the best of a few sampled moves instead of a uniformly random one.
+    def __init__(self, playouts=2000, time_limit=None, guided=False, exploration=1.4):
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.guided = guided
+        self.exploration = exploration
+        self.root = None # Kept after each move so the next search can start from the matching subtree
+
+    # Forget the search tree, e.g. at the start of a new game
+    def reset(self):
+        self.root = None
+
+    # Player who has won after player_idx moved, or None. Only the mover is checked, as process_move does: an
+    # opponent line booped into place doesn't end the game.
+    def winner_after_move(self, state, player_idx):
+        if state.player_won(player_idx):
+            return player_idx
+        return None
+
+    # A uniformly random legal move: a random empty cell, kitten or cat (if any are in reserve).
+    # The board is never full here, so drawing cells until an empty one comes up is cheaper than listing them.
+    def random_move(self, state, player_idx, occupied):
+        cell = random.randrange(NUM_CELLS)
+        while occupied >> cell & 1:
+            cell = random.randrange(NUM_CELLS)
+        x, y = cell_coords(cell)
+        if state.reserve_cats(player_idx) > 0 and random.random() < 0.5:
+            return (x, y, PieceType.CAT)
+        return (x, y, PieceType.KITTEN)
+
+    # Pick a playout move: uniformly random, or when guided the best of a few random moves, taking a win
+    # straight away and otherwise preferring the one that leaves the mover the most cats
+    def rollout_move(self, state, player_idx, occupied):
+        if not self.guided:
+            return self.random_move(state, player_idx, occupied)
+
+        best_move = None
+        best_score = None
+        my_cats = 2 * player_idx + 1
+        their_cats = 2 * (1 - player_idx) + 1
+        for _ in range(GUIDED_SAMPLES):
+            move = self.random_move(state, player_idx, occupied)
+            trial = state.copy()
+            trial.apply_move(move, player_idx)
+            if trial.player_won(player_idx):
+                return move
+            score = (2 * trial.pieces[my_cats].bit_count() + trial.reserve_cats(player_idx) -
+                     2 * trial.pieces[their_cats].bit_count() - trial.reserve_cats(1 - player_idx))
+            if best_score is None or score > best_score:
+                best_move = move
+                best_score = score
+        return best_move
+
+    # Play a game out from a position (the state is changed). Returns the winner, or None for a draw.
+    def rollout(self, state, player_idx):
+        for _ in range(ROLLOUT_LIMIT):
+            occupied = state.occupied()
+            if occupied == FULL_MASK:
+                return None
+            move = self.rollout_move(state, player_idx, occupied)
+            state.apply_move(move, player_idx)
+            winner = self.winner_after_move(state, player_idx)
+            if winner is not None:
+                return winner
+            player_idx = 1 - player_idx
+        return None
+
+    # Child with the highest UCT value: win rate plus an exploration bonus for rarely tried moves
+    def select_child(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best_child = None
+        best_value = float('-inf')
+        for child in node.children:
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best_value = value
+                best_child = child
+        return best_child
+
+    # One playout: select down the tree, expand one new node, play the game out and record the result
+    def run_playout(self, root):
+        node = root
+        while node.winner is None and node.untried_moves == [] and node.children:
+            node = self.select_child(node)
+
+        if node.winner is None:
+            if node.untried_moves is None:
+                node.untried_moves = node.state.get_possible_moves(node.player_idx)
+                random.shuffle(node.untried_moves)
+            if node.untried_moves:
+                move = node.untried_moves.pop()
+                state = node.state.copy()
+                state.apply_move(move, node.player_idx)
+                child = MCTSNode(state, 1 - node.player_idx, move, node,
+                                 self.winner_after_move(state, node.player_idx))
+                node.children.append(child)
+                node = child
+
+        if node.winner is not None:
+            winner = node.winner
+        else:
+            winner = self.rollout(node.state.copy(), node.player_idx)
+
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner != node.player_idx: # The player who moved into this node won
+                node.wins += 1
+            node = node.parent
+
+    # Start from the subtree for this position if the last search reached it, otherwise from a new tree
+    def find_root(self, state, player_idx):
+        if self.root is not None:
+            candidates = [self.root] + self.root.children + \
+                         [grandchild for child in self.root.children for grandchild in child.children]
+            for node in candidates:
+                if node.player_idx == player_idx and node.state == state:
+                    node.parent = None
+                    node.move = None
+                    return node
+        return MCTSNode(state, player_idx)
+
+    # Get the best move: the most visited move at the root once the playout or time budget is used up
+    def get_best_move(self, board, orange_cats, black_cats, current_player_idx):
+        state = BitBoard.from_board(board, orange_cats, black_cats)
+        root = self.find_root(state, current_player_idx)
+        if root.winner is not None or not state.get_possible_moves(current_player_idx):
+            return None
+
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+            self.run_playout(root)
+            while time.perf_counter() < deadline:
+                self.run_playout(root)
+        else:
+            for _ in range(max(self.playouts, 1)): # At least one playout, so the root has a child to pick
+                self.run_playout(root)
+
+        best_child = max(root.children, key=lambda child: child.visits)
+        self.root = best_child
+        return best_child.move
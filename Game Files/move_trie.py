@@ -0,0 +1,273 @@
+# Compact trie of Monte Carlo move sequences (e.g. self-play games from selfplay.py): for every sequence of
+# opening moves, how many games played it, how many of those were won by the player who made its last move,
+# and how far it was from the end of the game. A trie of node objects would not fit millions of games, so the
+# nodes live in flat NumPy columns in breadth-first order, each node's children stored together and sorted by
+# move code:
+#   first_child, num_children  where the node's children are
+#   move                       the move into the node, as a 7-bit code (see encode_move in bitboard.py)
+#   visits                     games that went through the node
+#   wins                       of those, the games won by the player who made the node's move
+#   distance_sum               sum over those games of the moves left until the game ended
+# Node 0 is the root (no moves made). Games always start with orange, so the node's mover is orange at odd
+# depths and black at even ones. Games are added in bulk: each batch is built into a trie one level at a time
+# with np.unique and merged into the existing trie the same way, so inserting in large batches is fastest.
+#
+# The trie file is a short header followed by the level offsets and then each column in turn.
+#
+# Build with: python move_trie.py <games file> [max_depth] [output file]
+# The games file is in selfplay.py's format; max_depth keeps only the first max_depth moves of each game.
+
+import os
+import struct
+import sys
+import time
+import numpy as np
+from bitboard import NUM_CELLS, decode_move
+from selfplay import read_games
+
+TRIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'move_trie.bin')
+TRIE_MAGIC = b'BOOPTRIE1\n'
+TRIE_HEADER = struct.Struct('<QII') # nodes, levels, max_depth (0 for no limit)
+MOVE_CODES = 2 * NUM_CELLS # Every move code is below this
+INSERT_BATCH = 100000 # Games built into a trie at a time by insert
+
+# Column name and type, in file order
+COLUMNS = [
+    ('first_child', np.uint32),
+    ('num_children', np.uint8),
+    ('move', np.uint8),
+    ('visits', np.uint32),
+    ('wins', np.uint32),
+    ('distance_sum', np.uint64)
+]
+STAT_COLUMNS = ['visits', 'wins', 'distance_sum']
+
+
+class MoveTrie:
+    # max_depth, if given, keeps only the first max_depth moves of each game inserted
+    def __init__(self, max_depth=None):
+        self.max_depth = max_depth
+        self.level_starts = np.array([0, 1], dtype=np.uint64) # Level d is level_starts[d] up to level_starts[d + 1]
+        self.first_child = np.ones(1, dtype=np.uint32)
+        self.num_children = np.zeros(1, dtype=np.uint8)
+        self.move = np.zeros(1, dtype=np.uint8)
+        self.visits = np.zeros(1, dtype=np.uint32)
+        self.wins = np.zeros(1, dtype=np.uint32)
+        self.distance_sum = np.zeros(1, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.move)
+
+    # Add games given as (winner, move codes) pairs, as yielded by SelfPlaySimulator.play or read_games.
+    # winner is 0, 1 or None for a draw. Returns the number of games added.
+    def insert(self, games, batch_size=INSERT_BATCH):
+        count = 0
+        batch = []
+        for game in games:
+            batch.append(game)
+            if len(batch) == batch_size:
+                count += self.insert_batch(*_pack_games(batch))
+                batch = []
+        if batch:
+            count += self.insert_batch(*_pack_games(batch))
+        return count
+
+    # Add a batch of games given as arrays: moves (games, longest game) of move codes, each game's length and
+    # winners (0, 1, or -1 for a draw). Returns the number of games added.
+    def insert_batch(self, moves, lengths, winners):
+        self.set_levels(_merge_levels(self.levels(), _game_levels(moves, lengths, winners, self.max_depth)))
+        return len(lengths)
+
+    # Node reached by playing the move codes from the start of the game, or None if no game played them
+    def find(self, codes):
+        node = 0
+        for code in codes:
+            node = self.child(node, code)
+            if node is None:
+                return None
+        return node
+
+    # The child of node reached by the move code, or None
+    def child(self, node, code):
+        start = int(self.first_child[node])
+        end = start + int(self.num_children[node])
+        i = start + int(np.searchsorted(self.move[start:end], code))
+        if i < end and self.move[i] == code:
+            return i
+        return None
+
+    # Visits, wins, win rate and mean distance to the end of the game for a node. Wins are for the player who
+    # made the node's move.
+    def node_stats(self, node):
+        visits = int(self.visits[node])
+        return {
+            'visits': visits,
+            'wins': int(self.wins[node]),
+            'win_rate': int(self.wins[node]) / visits if visits else 0.0,
+            'mean_distance': int(self.distance_sum[node]) / visits if visits else 0.0
+        }
+
+    # Stats of every move played after the move codes, as a dict of (x, y, piece_type) -> node_stats.
+    # Empty if no game played those codes.
+    def move_stats(self, codes):
+        node = self.find(codes)
+        if node is None:
+            return {}
+        start = int(self.first_child[node])
+        return {decode_move(int(self.move[i])): self.node_stats(i)
+                for i in range(start, start + int(self.num_children[node]))}
+
+    def save(self, path=TRIE_FILE):
+        with open(path, 'wb') as f:
+            f.write(TRIE_MAGIC)
+            f.write(TRIE_HEADER.pack(len(self), len(self.level_starts) - 1, self.max_depth or 0))
+            f.write(self.level_starts.astype('<u8').tobytes())
+            for name, dtype in COLUMNS:
+                f.write(getattr(self, name).astype(np.dtype(dtype).newbyteorder('<')).tobytes())
+
+    # Load a trie file; returns None if there is no file at path
+    @classmethod
+    def load(cls, path=TRIE_FILE):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(TRIE_MAGIC):
+            raise ValueError(f"{path} is not a move trie")
+
+        offset = len(TRIE_MAGIC)
+        num_nodes, num_levels, max_depth = TRIE_HEADER.unpack_from(data, offset)
+        offset += TRIE_HEADER.size
+        trie = cls(max_depth or None)
+        trie.level_starts = np.frombuffer(data, '<u8', num_levels + 1, offset).astype(np.uint64)
+        offset += 8 * (num_levels + 1)
+        for name, dtype in COLUMNS:
+            column = np.frombuffer(data, np.dtype(dtype).newbyteorder('<'), num_nodes, offset)
+            setattr(trie, name, column.astype(dtype))
+            offset += column.nbytes
+        return trie
+
+    # The trie as a list of levels, each a dict of arrays: parent (index in the level above), move and the stats
+    def levels(self):
+        levels = []
+        for d in range(len(self.level_starts) - 1):
+            start, end = int(self.level_starts[d]), int(self.level_starts[d + 1])
+            if d == 0:
+                parent = np.zeros(1, dtype=np.intp)
+            else:
+                above = slice(int(self.level_starts[d - 1]), start)
+                parent = np.repeat(np.arange(start - above.start), self.num_children[above])
+            level = {'parent': parent, 'move': self.move[start:end]}
+            for name in STAT_COLUMNS:
+                level[name] = getattr(self, name)[start:end]
+            levels.append(level)
+        return levels
+
+    # Rebuild the columns from a list of levels whose nodes are sorted by parent, then move
+    def set_levels(self, levels):
+        sizes = [len(level['move']) for level in levels]
+        self.level_starts = np.concatenate([[0], np.cumsum(sizes)]).astype(np.uint64)
+        first_child = []
+        num_children = []
+        for d, size in enumerate(sizes):
+            if d + 1 < len(levels):
+                counts = np.bincount(levels[d + 1]['parent'], minlength=size)
+            else:
+                counts = np.zeros(size, dtype=np.intp)
+            num_children.append(counts)
+            first_child.append(int(self.level_starts[d + 1]) + np.concatenate([[0], np.cumsum(counts)[:-1]]))
+        self.first_child = np.concatenate(first_child).astype(np.uint32)
+        self.num_children = np.concatenate(num_children).astype(np.uint8)
+        self.move = np.concatenate([level['move'] for level in levels]).astype(np.uint8)
+        for name, dtype in COLUMNS:
+            if name in STAT_COLUMNS:
+                setattr(self, name, np.concatenate([level[name] for level in levels]).astype(dtype))
+
+
+# Pad a list of (winner, move codes) games into the arrays insert_batch takes
+def _pack_games(games):
+    lengths = np.array([len(codes) for _, codes in games], dtype=np.intp)
+    moves = np.zeros((len(games), max(lengths.max(), 1)), dtype=np.uint8)
+    for i, (_, codes) in enumerate(games):
+        moves[i, :len(codes)] = codes
+    winners = np.array([-1 if winner is None else winner for winner, _ in games], dtype=np.int8)
+    return moves, lengths, winners
+
+
+# Build a batch of games into trie levels (see MoveTrie.levels)
+def _game_levels(moves, lengths, winners, max_depth=None):
+    lengths = np.asarray(lengths, dtype=np.intp)
+    winners = np.asarray(winners)
+    depth = int(lengths.max()) if len(lengths) else 0
+    if max_depth is not None:
+        depth = min(depth, max_depth)
+
+    levels = [{
+        'parent': np.zeros(1, dtype=np.intp),
+        'move': np.zeros(1, dtype=np.uint8),
+        'visits': np.array([len(lengths)], dtype=np.uint64),
+        'wins': np.array([np.count_nonzero(winners == 1)], dtype=np.uint64), # The root's "mover" is black
+        'distance_sum': np.array([lengths.sum()], dtype=np.uint64)
+    }]
+    node = np.zeros(len(lengths), dtype=np.intp) # Each game's node in the level above
+    for d in range(1, depth + 1):
+        games = np.nonzero(lengths >= d)[0]
+        keys = node[games] * MOVE_CODES + moves[games, d - 1]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        node[games] = inverse
+        won = winners[games] == (d - 1) % 2
+        levels.append(_level(unique_keys, inverse, np.ones(len(games)), won, lengths[games] - d))
+    return levels
+
+
+# Merge two lists of trie levels into one, adding up the stats of nodes that are in both
+def _merge_levels(a, b):
+    merged = [{'parent': a[0]['parent'], 'move': a[0]['move']}]
+    for name in STAT_COLUMNS:
+        merged[0][name] = a[0][name].astype(np.uint64) + b[0][name]
+    map_a = np.zeros(1, dtype=np.intp) # Merged index of each node of a's level above
+    map_b = np.zeros(1, dtype=np.intp)
+    for d in range(1, max(len(a), len(b))):
+        parts = []
+        if d < len(a):
+            parts.append((a[d], map_a))
+        if d < len(b):
+            parts.append((b[d], map_b))
+        keys = np.concatenate([mapping[level['parent']] * MOVE_CODES + level['move'] for level, mapping in parts])
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        stats = {name: np.concatenate([level[name] for level, _ in parts]) for name in STAT_COLUMNS}
+        merged.append(_level(unique_keys, inverse, stats['visits'], stats['wins'], stats['distance_sum']))
+
+        # Where this level's nodes of a and b ended up, for the level below
+        size_a = len(a[d]['move']) if d < len(a) else 0
+        map_a = inverse[:size_a]
+        map_b = inverse[size_a:]
+    return merged
+
+
+# One trie level from sorted unique parent/move keys, adding up the stats of the entries mapped to each key
+def _level(unique_keys, inverse, visits, wins, distances):
+    size = len(unique_keys)
+    return {
+        'parent': unique_keys // MOVE_CODES,
+        'move': (unique_keys % MOVE_CODES).astype(np.uint8),
+        'visits': np.bincount(inverse, weights=visits, minlength=size).astype(np.uint64),
+        'wins': np.bincount(inverse, weights=wins, minlength=size).astype(np.uint64),
+        'distance_sum': np.bincount(inverse, weights=distances, minlength=size).astype(np.uint64)
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python move_trie.py <games file> [max_depth] [output file]")
+        sys.exit(1)
+    games_file = sys.argv[1]
+    max_depth = int(sys.argv[2]) if len(sys.argv) > 2 and int(sys.argv[2]) > 0 else None
+    output = sys.argv[3] if len(sys.argv) > 3 else TRIE_FILE
+
+    start = time.perf_counter()
+    trie = MoveTrie(max_depth)
+    added = trie.insert(read_games(games_file))
+    trie.save(output)
+    print(f"Added {added:,} games ({len(trie):,} nodes) to {output} ({os.path.getsize(output):,} bytes) "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,158 @@
+# Perft: count every legal move sequence of a given length from a position, playing each one through the
+# rules the search uses (placement, check_boop, trio graduation, and the game ending when the mover wins).
+# The counts for the positions in perft_positions.txt were checked when the file was written, so a changed
+# count means a rules change, and the nodes per second give a benchmark for any speedup to the rules or search.
+#
+# Usage: python perft.py [max depth] [bitboard]
+# Runs every reference position up to max depth (default: every depth listed) and reports any mismatch.
+# With bitboard the counts come from BitBoard (bitboard.py) instead of the list-of-lists board.
+
+import os
+import sys
+import time
+from pieces import PieceType, PieceColor, GameState, get_piece
+from rules import BoopRules
+from ai import BoopAI
+from zobrist import compute_key
+from bitboard import BitBoard
+from constants import BOARD_SIZE
+
+POSITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perft_positions.txt')
+
+# Board strings list rows top to bottom separated by '/', with '.' for an empty cell
+PIECE_CHARS = {
+    'o': get_piece(PieceType.KITTEN, PieceColor.ORANGE),
+    'O': get_piece(PieceType.CAT, PieceColor.ORANGE),
+    'b': get_piece(PieceType.KITTEN, PieceColor.BLACK),
+    'B': get_piece(PieceType.CAT, PieceColor.BLACK),
+}
+CHAR_PIECES = {piece: char for char, piece in PIECE_CHARS.items()}
+
+
+def board_from_string(text):
+    return [[PIECE_CHARS.get(char) for char in row] for row in text.split('/')]
+
+
+def board_to_string(board):
+    return '/'.join(''.join(CHAR_PIECES.get(piece, '.') for piece in row) for row in board)
+
+
+# Read the reference positions. Each line is: name | board | orange_cats black_cats player_to_move | counts
+# for depth 1, 2, ...
+def load_positions(path=POSITIONS_FILE):
+    positions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, board, setup, counts = [field.strip() for field in line.split('|')]
+            orange_cats, black_cats, player_idx = map(int, setup.split())
+            positions.append({
+                'name': name,
+                'board': board_from_string(board),
+                'orange_cats': orange_cats,
+                'black_cats': black_cats,
+                'player_idx': player_idx,
+                'counts': [int(count) for count in counts.split()]
+            })
+    return positions
+
+
+# Count the move sequences of length depth from a GameState using BoopAI's apply_move/undo_move.
+# Returns (leaves, nodes) where nodes is the number of moves made.
+def _perft_state(ai, state, depth):
+    moves = ai.get_possible_moves(state.current_player, state.board, state.orange_cats, state.black_cats)
+    if depth == 1:
+        for move in moves:
+            ai.undo_move(state, ai.apply_move(state, move))
+        return len(moves), len(moves)
+
+    leaves = 0
+    nodes = len(moves)
+    for move in moves:
+        mover = state.current_player
+        undo = ai.apply_move(state, move)
+        if not ai.game.player_won(mover, state.board, state.orange_cats, state.black_cats):
+            child_leaves, child_nodes = _perft_state(ai, state, depth - 1)
+            leaves += child_leaves
+            nodes += child_nodes
+        ai.undo_move(state, undo)
+    return leaves, nodes
+
+
+# The same count on a BitBoard, copying the position for each move
+def _perft_bitboard(position, player_idx, depth):
+    moves = position.get_possible_moves(player_idx)
+    if depth == 1:
+        for move in moves:
+            position.copy().apply_move(move, player_idx)
+        return len(moves), len(moves)
+
+    leaves = 0
+    nodes = len(moves)
+    for move in moves:
+        child = position.copy()
+        child.apply_move(move, player_idx)
+        if not child.player_won(player_idx):
+            child_leaves, child_nodes = _perft_bitboard(child, 1 - player_idx, depth - 1)
+            leaves += child_leaves
+            nodes += child_nodes
+    return leaves, nodes
+
+
+# Count the legal move sequences of length depth from a position (the empty board by default).
+# Returns a dict with the leaf count, the number of moves made, the time taken and moves made per second.
+def perft(depth, board=None, orange_cats=0, black_cats=0, player_idx=0, use_bitboard=False):
+    if board is None:
+        board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+
+    start = time.perf_counter()
+    if depth == 0:
+        leaves, nodes = 1, 0
+    elif use_bitboard:
+        leaves, nodes = _perft_bitboard(BitBoard.from_board(board, orange_cats, black_cats), player_idx, depth)
+    else:
+        rules = BoopRules()
+        ai = BoopAI(rules, depth, tt_size_mb=0)
+        state = GameState(board, orange_cats, black_cats, player_idx,
+                          trios_clean=not rules.trio_on_board(board),
+                          key=compute_key(board, orange_cats, black_cats, player_idx))
+        leaves, nodes = _perft_state(ai, state, depth)
+    seconds = time.perf_counter() - start
+
+    return {
+        'depth': depth,
+        'leaves': leaves,
+        'nodes': nodes,
+        'seconds': seconds,
+        'nodes_per_second': nodes / seconds if seconds > 0 else 0.0
+    }
+
+
+if __name__ == "__main__":
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    use_bitboard = len(sys.argv) > 2 and sys.argv[2] == 'bitboard'
+
+    failures = 0
+    total_nodes = 0
+    total_seconds = 0.0
+    for position in load_positions():
+        for depth, expected in enumerate(position['counts'], start=1):
+            if max_depth is not None and depth > max_depth:
+                break
+            result = perft(depth, position['board'], position['orange_cats'], position['black_cats'],
+                           position['player_idx'], use_bitboard)
+            total_nodes += result['nodes']
+            total_seconds += result['seconds']
+            status = "ok" if result['leaves'] == expected else f"MISMATCH (expected {expected})"
+            if result['leaves'] != expected:
+                failures += 1
+            print(f"{position['name']:<20} depth {depth}: {result['leaves']:>10} leaves "
+                  f"{result['nodes_per_second']:>10,.0f} nodes/s  {status}")
+
+    if total_seconds > 0:
+        print(f"Total: {total_nodes:,} nodes in {total_seconds:.2f}s ({total_nodes / total_seconds:,.0f} nodes/s)")
+    if failures:
+        print(f"{failures} mismatches")
+        sys.exit(1)
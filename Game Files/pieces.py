@@ -17,10 +17,16 @@ class PlayerType(Enum):
     AI = 1
 
 # Keep track of the color and type of a piece
+# There are only four distinct pieces, so they are interned: Piece(...) and get_piece(...) always return one
+# of the shared immutable instances below, equality is identity and the hash is computed once.
 class Piece:
-    def __init__(self, type=PieceType.KITTEN, color=PieceColor.ORANGE):
-        self.color = color
-        self.type = type
+    __slots__ = ('color', 'type', '_hash')
+
+    def __new__(cls, type=PieceType.KITTEN, color=PieceColor.ORANGE):
+        return _PIECES[(type, color)]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece instances are shared and cannot be modified")
 
     def __repr__(self):
         return f"Piece({self.color.name}, {self.type.name})"
@@ -28,21 +34,42 @@ class Piece:
     def __eq__(self, other):
         if not isinstance(other, Piece):
             return NotImplemented
-        return self.color == other.color and self.type == other.type
+        return self is other
 
     def __hash__(self):
-        return hash((self.color, self.type))
+        return self._hash
+
+    # Unpickling and copying go back through the factory so pieces stay interned
+    def __reduce__(self):
+        return (get_piece, (self.type, self.color))
+
+def _make_piece(piece_type, color):
+    piece = object.__new__(Piece)
+    object.__setattr__(piece, 'color', color)
+    object.__setattr__(piece, 'type', piece_type)
+    object.__setattr__(piece, '_hash', hash((color, piece_type)))
+    return piece
+
+_PIECES = {(piece_type, color): _make_piece(piece_type, color)
+           for color in (PieceColor.ORANGE, PieceColor.BLACK)
+           for piece_type in (PieceType.KITTEN, PieceType.CAT)}
+
+# Factory for the shared piece of a given type and color
+def get_piece(piece_type, color):
+    return _PIECES[(piece_type, color)]
 
 # Represents the state of the game for AI evaluation
 class GameState:
-    def __init__(self, board, orange_cats, black_cats, current_player):
+    def __init__(self, board, orange_cats, black_cats, current_player, trios_clean, key):
         self.board = [row[:] for row in board]  # Deep copy
         self.orange_cats = orange_cats
         self.black_cats = black_cats
         self.current_player = current_player
+        self.trios_clean = trios_clean  # False if a trio may be sitting on the board ungraduated
+        self.key = key  # Zobrist key (see zobrist.py), kept current by BoopAI.apply_move/undo_move
 
     def copy(self):
-        return GameState(self.board, self.orange_cats, self.black_cats, self.current_player)
+        return GameState(self.board, self.orange_cats, self.black_cats, self.current_player, self.trios_clean, self.key)
 
     def __repr__(self):
         board_str = "\n".join([" ".join([p.color.name[0] + p.type.name[0] if p else "--" for p in row]) for row in self.board])
@@ -0,0 +1,219 @@
+# This class implements the rules of the game: booping, finding three in a row and deciding if someone has won.
+# It is pure Python with no pygame dependency, so AI clients, simulations and worker processes can use it
+# headless. BoopGame in game.py builds on it to run a game, and the GUI attaches sounds.
+
+from pieces import PieceType, PieceColor, get_piece
+from constants import BOARD_SIZE
+
+# Every three-cell window on the board (rows, columns and both diagonals), each listed once as
+# [(x, y), (x, y), (x, y)] starting from its smallest (y, x) cell. Windows are ordered by that cell,
+# then right, down, down-right, down-left, which is the order trios are chosen in.
+THREE_IN_ROW_DIRECTIONS = [(1,0),(0,1),(1,1),(-1,1)]
+
+def _build_three_in_row_lines():
+    lines = []
+    for y in range(BOARD_SIZE):
+        for x in range(BOARD_SIZE):
+            for dx, dy in THREE_IN_ROW_DIRECTIONS:
+                end_x, end_y = x + dx * 2, y + dy * 2
+                if 0 <= end_x < BOARD_SIZE and 0 <= end_y < BOARD_SIZE:
+                    lines.append(((x, y), (x + dx, y + dy), (end_x, end_y)))
+    return lines
+
+THREE_IN_ROW_LINES = _build_three_in_row_lines()
+
+# LINES_THROUGH_CELL[y][x] lists the indices into THREE_IN_ROW_LINES of every window containing (x, y)
+LINES_THROUGH_CELL = [[[] for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+for _line_idx, _line in enumerate(THREE_IN_ROW_LINES):
+    for _x, _y in _line:
+        LINES_THROUGH_CELL[_y][_x].append(_line_idx)
+
+# Rules of the game, checked against a board (the rules object's own board by default)
+class BoopRules:
+    def __init__(self):
+        self.board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        self.orange_cats = 0
+        self.black_cats = 0
+        self.last_placed_pos = (-1,-1)
+
+    # True if a cell is empty
+    def is_empty(self, x, y, board=None):
+        if board is None:
+            board = self.board
+        return board[y][x] is None
+
+    # Places a piece on the board
+    def place_piece(self, x, y, piece, board=None):
+        if board is None:
+            board = self.board
+        if 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE:
+            board[y][x] = piece
+            self.last_placed_pos = (x,y)
+            #print(f"{piece.color} {piece.type} placed at {x},{y}")
+            return True
+        return False
+
+    # Check if position is within the board dimensions
+    def is_valid_position(self, x, y):
+        return (0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE)
+
+    # True if the player can place a piece_type at (x, y): the cell is empty and, for a cat, they have one in
+    # reserve. Used to check moves from hashed tables, where a key collision can hand back any move.
+    def is_legal_move(self, x, y, piece_type, player_idx, board=None, orange_cats=None, black_cats=None):
+        if board is None:
+            board = self.board
+        if orange_cats is None:
+            orange_cats = self.orange_cats
+        if black_cats is None:
+            black_cats = self.black_cats
+        if not self.is_valid_position(x, y) or board[y][x] is not None:
+            return False
+        return piece_type == PieceType.KITTEN or (orange_cats if player_idx == 0 else black_cats) > 0
+
+    # Check in all directions for booping
+    def check_boop(self, placed_x, placed_y, board=None):
+        if board is None:
+            board = self.board
+
+        moves_made = []
+
+        # Determine if we placed a cat or a kitten
+        if board[placed_y][placed_x] is None: # Should not happen, but for safety
+            return moves_made
+
+        is_placed_piece_cat = (board[placed_y][placed_x].type == PieceType.CAT)
+
+        # Check in all 8 directions
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+
+                target_x = placed_x + dx
+                target_y = placed_y + dy
+
+                # If there's a piece adjacent to our placed piece
+                if (self.is_valid_position(target_x, target_y)) and board[target_y][target_x] is not None:
+                    target_piece = board[target_y][target_x]
+                    is_target_piece_cat = (target_piece.type == PieceType.CAT)
+
+                    # If the placed piece is a kitten, it cannot boop cats
+                    if not is_placed_piece_cat and is_target_piece_cat:
+                        continue
+
+                    # Calculate where it would be pushed to
+                    push_to_x = target_x + dx
+                    push_to_y = target_y + dy
+
+                    # Check if push destination is valid and empty
+                    if (self.is_valid_position(push_to_x, push_to_y)) and board[push_to_y][push_to_x] is None:
+                        # Do boop
+                        board[push_to_y][push_to_x] = target_piece
+                        board[target_y][target_x] = None
+                        moves_made.append({
+                            'from': (target_x, target_y),
+                            'to': (push_to_x, push_to_y),
+                            'piece': target_piece
+                        })
+                    elif not self.is_valid_position(push_to_x, push_to_y):
+                        # Boop off board
+                        board[target_y][target_x] = None
+                        moves_made.append({
+                            'from': (target_x, target_y),
+                            'to': (-1, -1), # Indicates off board
+                            'piece': target_piece
+                        })
+        return moves_made
+
+    # Helper function that determines if the specified player owns the specified piece
+    def owns_piece(self, piece, player_idx):
+        if player_idx == 0: # Orange
+            return (piece.color == PieceColor.ORANGE)
+        else: # Black
+            return (piece.color == PieceColor.BLACK)
+
+    # Finds if there are three in a row with at least one kitten for the specified player
+    # As per the modified rules, if multiple trios exist, the one containing the piece with the smallest
+    # y coordinate followed by the smallest x coordinate is chosen. THREE_IN_ROW_LINES is already in that order.
+
+    # If lines is given (indices into THREE_IN_ROW_LINES, in increasing order) only those windows are checked.
+
+    # ----- This would be modified to include writing queue to Trie and/or file ----- # 
+    def first_three_in_row(self, player_idx, board=None, lines=None):
+        if board is None:
+            board = self.board
+        color = PieceColor.ORANGE if player_idx == 0 else PieceColor.BLACK
+        kitten = get_piece(PieceType.KITTEN, color)
+        cat = get_piece(PieceType.CAT, color)
+        candidates = THREE_IN_ROW_LINES if lines is None else [THREE_IN_ROW_LINES[i] for i in lines]
+
+        # Pieces are interned, so identity checks are enough
+        for line in candidates:
+            (x1, y1), (x2, y2), (x3, y3) = line
+            piece1 = board[y1][x1]
+            if piece1 is not kitten and piece1 is not cat:
+                continue
+            piece2 = board[y2][x2]
+            if piece2 is not kitten and piece2 is not cat:
+                continue
+            piece3 = board[y3][x3]
+            if piece3 is not kitten and piece3 is not cat:
+                continue
+
+            if piece1 is kitten or piece2 is kitten or piece3 is kitten:
+                return {
+                    'found': True,
+                    'piece_type': piece1.type, # This doesn't matter much for resolution
+                    'positions': list(line)
+                }
+
+        return {'found': False}
+
+    # Indices of the lines that can newly hold three in a row after a move: the ones through the placed
+    # cell and through every cell a booped piece landed on. Cells a piece was booped away from can't complete a line.
+    def lines_changed_by_move(self, x, y, moves_made):
+        line_ids = set(LINES_THROUGH_CELL[y][x])
+        for boop in moves_made:
+            to_x, to_y = boop['to']
+            if to_x >= 0:
+                line_ids.update(LINES_THROUGH_CELL[to_y][to_x])
+        return sorted(line_ids)
+
+    # Incremental first_three_in_row that only checks the lines changed by a move (placement plus its check_boop list).
+    # It picks the same trio as the full scan as long as neither player had a trio on the board before the move,
+    # which trio_on_board(board, lines) can confirm for the next move once this move's trio has been removed.
+    def first_three_in_row_after_move(self, player_idx, x, y, moves_made, board=None):
+        return self.first_three_in_row(player_idx, board, self.lines_changed_by_move(x, y, moves_made))
+
+    # True if either player has three in a row with a kitten on the given lines (or anywhere if lines is None)
+    def trio_on_board(self, board=None, lines=None):
+        return self.first_three_in_row(0, board, lines)['found'] or self.first_three_in_row(1, board, lines)['found']
+
+    # Returns true if the specified player has won
+
+    # ----- This would be modified to include writing queue to Trie and/or file ----- # 
+    def player_won(self, player_idx, board=None, orange_cats=None, black_cats=None):
+        if board is None:
+            board = self.board
+        if orange_cats is None:
+            orange_cats = self.orange_cats
+        if black_cats is None:
+            black_cats = self.black_cats
+        cat = get_piece(PieceType.CAT, PieceColor.ORANGE if player_idx == 0 else PieceColor.BLACK)
+
+        # Check if 8+ cats on the board
+        count_cats_on_board = 0
+        for row in board:
+            count_cats_on_board += row.count(cat)
+
+        if count_cats_on_board >= 8:
+            return True
+
+        # Check 3 cats in a row (no kittens allowed)
+        for line in THREE_IN_ROW_LINES:
+            for x, y in line:
+                if board[y][x] is not cat:
+                    break
+            else:
+                return True # Found 3 cats in a row
+        return False
@@ -0,0 +1,123 @@
+# Counters for one BoopAI search, to show where search time goes: nodes visited at each ply, leaf evaluations,
+# quiescence search nodes, transposition table hits, beta cutoffs and how far down the ordered move list they
+# happened, and the time and node count of each iterative deepening iteration. BoopAI.get_best_move fills one
+# in per move.
+
+import json
+import time
+
+
+class SearchStats:
+    def __init__(self, num_plies):
+        self.nodes_by_ply = [0] * num_plies # Nodes visited at each ply from the root (the root is ply 0)
+        self.leaf_evals = 0
+        self.quiescence_nodes = 0 # Forcing moves searched below the leaves (not counted in nodes_by_ply)
+        self.tt_probes = 0
+        self.tt_hits = 0 # Probes that found the position
+        self.tt_cutoffs = 0 # Hits that answered the node without searching it
+        self.cutoffs = 0
+        self.cutoff_move_index = {} # Position in the ordered move list -> beta cutoffs caused by the move there
+        self.iterations = [] # One dict per root search: depth, seconds, nodes, best_score, completed
+        self.aspiration_researches = 0 # Root searches repeated because the score fell outside the window
+        self.seconds = 0.0
+        self.best_move = None
+        self.book_move = False # True if the move came from the opening book
+        self.solver_nodes = 0 # Nodes the forced-win solver used, if it ran
+        self.solver_line = None # The winning line, if the solver proved a forced win
+
+    def nodes(self):
+        return sum(self.nodes_by_ply)
+
+    # Note a beta cutoff caused by the move at this position in the ordered move list
+    def record_cutoff(self, move_index):
+        self.cutoffs += 1
+        self.cutoff_move_index[move_index] = self.cutoff_move_index.get(move_index, 0) + 1
+
+    def add_iteration(self, depth, seconds, nodes, best_score, completed=True):
+        self.iterations.append({
+            'depth': depth,
+            'seconds': seconds,
+            'nodes': nodes,
+            'best_score': best_score,
+            'completed': completed
+        })
+
+    # Add the counters of another search (e.g. one done in a worker process) to these
+    def merge(self, other):
+        for ply, count in enumerate(other.nodes_by_ply):
+            self.nodes_by_ply[ply] += count
+        self.leaf_evals += other.leaf_evals
+        self.quiescence_nodes += other.quiescence_nodes
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.tt_cutoffs += other.tt_cutoffs
+        self.cutoffs += other.cutoffs
+        for move_index, count in other.cutoff_move_index.items():
+            self.cutoff_move_index[move_index] = self.cutoff_move_index.get(move_index, 0) + count
+
+    # Deepest completed iteration, or 0
+    def depth(self):
+        completed = [iteration['depth'] for iteration in self.iterations if iteration['completed']]
+        return max(completed) if completed else 0
+
+    # Growth in nodes per extra ply: the ratio of the last two completed iterations when there are two,
+    # otherwise the depth-th root of the node count
+    def effective_branching_factor(self):
+        completed = [iteration for iteration in self.iterations if iteration['completed']]
+        if len(completed) >= 2 and completed[-2]['nodes'] > 0:
+            return completed[-1]['nodes'] / completed[-2]['nodes']
+        if completed and completed[-1]['depth'] > 0:
+            return completed[-1]['nodes'] ** (1 / completed[-1]['depth'])
+        return 0.0
+
+    # Fraction of beta cutoffs caused by the first move tried, a measure of how good move ordering is
+    def first_move_cutoff_rate(self):
+        return self.cutoff_move_index.get(0, 0) / self.cutoffs if self.cutoffs else 0.0
+
+    def to_dict(self):
+        last_ply = max((ply for ply, count in enumerate(self.nodes_by_ply) if count), default=-1)
+        return {
+            'time': time.time(),
+            'best_move': None if self.best_move is None else
+                [self.best_move[0], self.best_move[1], self.best_move[2].name],
+            'book_move': self.book_move,
+            'solver_nodes': self.solver_nodes,
+            'solver_line': None if self.solver_line is None else
+                [[x, y, piece_type.name] for x, y, piece_type in self.solver_line],
+            'seconds': self.seconds,
+            'depth': self.depth(),
+            'nodes': self.nodes(),
+            'nodes_by_ply': self.nodes_by_ply[:last_ply + 1],
+            'leaf_evals': self.leaf_evals,
+            'quiescence_nodes': self.quiescence_nodes,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'cutoffs': self.cutoffs,
+            'cutoff_move_index': {str(index): count for index, count in sorted(self.cutoff_move_index.items())},
+            'first_move_cutoff_rate': self.first_move_cutoff_rate(),
+            'effective_branching_factor': self.effective_branching_factor(),
+            'aspiration_researches': self.aspiration_researches,
+            'iterations': self.iterations
+        }
+
+    # Append these stats to a file as one line of JSON
+    def log_json(self, path):
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.to_dict()) + '\n')
+
+    # One line summary for printing
+    def summary(self):
+        if self.book_move:
+            return f"opening book move ({1000 * self.seconds:.2f} ms)"
+        if self.solver_line is not None:
+            return (f"forced win in {(len(self.solver_line) + 1) // 2} moves proven with {self.solver_nodes:,} "
+                    f"nodes ({self.seconds:.2f}s)")
+        nodes = self.nodes()
+        nps = nodes / self.seconds if self.seconds > 0 else 0.0
+        hit_rate = self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+        return (f"depth {self.depth()}, {nodes:,} nodes ({nps:,.0f}/s), {self.leaf_evals:,} evals, "
+                f"{self.quiescence_nodes:,} quiescence nodes, "
+                f"TT hits {100 * hit_rate:.0f}%, {self.cutoffs:,} cutoffs "
+                f"({100 * self.first_move_cutoff_rate():.0f}% on the first move), "
+                f"EBF {self.effective_branching_factor():.1f}")
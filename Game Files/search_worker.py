@@ -0,0 +1,107 @@
+# One long-lived search thread for a BoopAI, so a client never has more than one search running at a time.
+# Jobs are searches of a position; submitting a job cancels the one that is running and replaces any that is
+# still waiting ("latest state wins"), so a burst of states costs one search, not one per state. Cancelling is
+# cooperative: BoopAI.stop() makes the search give up at its next node. A job can also have a hard deadline,
+# after which it stops and reports the best move it has (see BoopAI.search_best_moves).
+
+import itertools
+import threading
+import time
+
+
+class SearchWorker:
+    def __init__(self, ai):
+        self.ai = ai
+        self.condition = threading.Condition()
+        self.pending = None # The job waiting to start, if any
+        self.current = None # The job being searched, if any
+        self.job_ids = itertools.count(1)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Queue a search of the position for player_idx and return its job id. on_done(move, stats) is called on
+    # the worker thread when it finishes, unless the job is cancelled first. time_limit is passed on to
+    # get_best_move (None for the AI's own setting); deadline is a hard limit in seconds from when the job starts.
+    def submit(self, board, orange_cats, black_cats, player_idx, on_done, time_limit=None, deadline=None):
+        job = {
+            'id': next(self.job_ids),
+            'board': [row[:] for row in board],
+            'orange_cats': orange_cats,
+            'black_cats': black_cats,
+            'player_idx': player_idx,
+            'on_done': on_done,
+            'time_limit': time_limit,
+            'deadline': deadline,
+            'stop_at': None, # The hard deadline as a perf_counter time, once the job starts
+            'cancelled': False
+        }
+        with self.condition:
+            self.cancel_jobs()
+            self.pending = job
+            self.condition.notify()
+        return job['id']
+
+    # Cancel the running job and drop the waiting one. on_done isn't called for either.
+    def cancel(self):
+        with self.condition:
+            self.cancel_jobs()
+
+    # Give the running job job_id a new hard deadline, seconds from now, or keep its current one if that is
+    # earlier. Returns False if that job isn't running (it finished, was cancelled, or hasn't started).
+    def set_deadline(self, job_id, seconds):
+        with self.condition:
+            job = self.current
+            if job is None or job['id'] != job_id or job['cancelled']:
+                return False
+            stop_at = time.perf_counter() + seconds
+            if job['stop_at'] is not None:
+                stop_at = min(stop_at, job['stop_at'])
+            job['stop_at'] = stop_at
+            self.ai.stop_time = stop_at
+            return True
+
+    # Stop the worker thread, cancelling any job, and wait for it to exit
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.cancel_jobs()
+            self.condition.notify()
+        self.thread.join()
+
+    # Cancel the running and waiting jobs; the caller holds the lock
+    def cancel_jobs(self):
+        if self.current is not None and not self.current['cancelled']:
+            self.current['cancelled'] = True
+            self.ai.stop()
+        self.pending = None
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                job = self.pending
+                self.pending = None
+                self.current = job
+                # Set under the lock so a cancel can't be lost between here and the search starting
+                if job['deadline'] is not None:
+                    job['stop_at'] = time.perf_counter() + job['deadline']
+                self.ai.stop_time = job['stop_at']
+
+            move = stats = None
+            try:
+                move, stats = self.ai.get_best_move(job['board'], job['orange_cats'], job['black_cats'],
+                                                    job['player_idx'], time_limit=job['time_limit'],
+                                                    with_stats=True)
+            except Exception as e:
+                print(f"Search failed: {e}")
+
+            with self.condition:
+                self.current = None
+                self.ai.stop_time = None
+                cancelled = job['cancelled']
+            if not cancelled:
+                job['on_done'](move, stats)
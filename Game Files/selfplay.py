@@ -0,0 +1,196 @@
+# Batched self-play simulator for collecting Monte Carlo game sequences. BoopGame.process_move plays one game at
+# a time; this keeps a whole batch of games as stacked NumPy arrays and makes one move in every game per step,
+# so placement, boops, trio graduation and win checks each cost a few array operations for the whole batch.
+# The rules are the same as process_move: the mover graduates the first trio in THREE_IN_ROW_LINES order and
+# only the mover is checked for a win.
+#
+# Usage: python selfplay.py <num_games> [batch_size] [random|guided] [output file]
+# Each finished game is written as one line: the winner (0, 1, or - for a draw) then its move codes
+# (see encode_move in bitboard.py).
+
+import sys
+import time
+import numpy as np
+from constants import BOARD_SIZE
+from bitboard import NUM_CELLS, BOOP_DIRECTIONS, cell_index, cell_coords
+from batch_eval import LINE_CELLS, evaluate_boards
+
+# Boards are (games, NUM_CELLS + 1) int8 arrays of batch_eval cell codes (1 + 2 * player + piece type value).
+# The extra last column is always empty and stands in for "off the board" in the tables below.
+OFF_BOARD = NUM_CELLS
+
+MAX_MOVES = 200 # Games still going after this many moves are draws
+GUIDED_SAMPLES = 4 # Moves a guided policy looks at before picking one
+
+
+def _build_push_tables():
+    # NEIGHBOR_CELLS[d][cell] is the neighbor of cell in boop direction d and PUSH_CELLS[d][cell] is where a
+    # boop would push it, OFF_BOARD when there is no such cell
+    neighbors = np.full((len(BOOP_DIRECTIONS), NUM_CELLS), OFF_BOARD, dtype=np.intp)
+    pushes = np.full((len(BOOP_DIRECTIONS), NUM_CELLS), OFF_BOARD, dtype=np.intp)
+    for d, (dx, dy) in enumerate(BOOP_DIRECTIONS):
+        for cell in range(NUM_CELLS):
+            x, y = cell_coords(cell)
+            if 0 <= x + dx < BOARD_SIZE and 0 <= y + dy < BOARD_SIZE:
+                neighbors[d, cell] = cell_index(x + dx, y + dy)
+                if 0 <= x + 2 * dx < BOARD_SIZE and 0 <= y + 2 * dy < BOARD_SIZE:
+                    pushes[d, cell] = cell_index(x + 2 * dx, y + 2 * dy)
+    return neighbors, pushes
+
+
+NEIGHBOR_CELLS, PUSH_CELLS = _build_push_tables()
+
+
+# Make one move in every game: players[i] places a cat (cat_moves[i] == 1) or a kitten on cells[i].
+# boards and reserve ((games, 2) reserve cats per player) are changed in place. Returns which movers won.
+# Boops in different directions never touch the same cells, so they can all be applied at once.
+def apply_moves(boards, reserve, players, cells, cat_moves):
+    rows = np.arange(len(boards))
+    boards[rows, cells] = 1 + 2 * players + cat_moves
+    reserve[rows, players] -= cat_moves
+
+    # Boops: a kitten cannot boop cats, and a piece only moves if its push cell is empty or off the board
+    neighbors = NEIGHBOR_CELLS[:, cells]
+    pushes = PUSH_CELLS[:, cells]
+    targets = boards[rows, neighbors]
+    target_is_cat = (targets != 0) & (targets % 2 == 0)
+    movable = (targets != 0) & ((cat_moves == 1) | ~target_is_cat)
+    off = (pushes == OFF_BOARD) & (neighbors != OFF_BOARD)
+    booped = movable & (off | (boards[rows, pushes] == 0))
+    pushed = booped & ~off
+    boop_rows = np.broadcast_to(rows, neighbors.shape)
+    boards[boop_rows[booped], neighbors[booped]] = 0
+    boards[boop_rows[pushed], pushes[pushed]] = targets[pushed]
+
+    # Graduate the mover's first trio with at least one kitten
+    kitten_codes = (1 + 2 * players)[:, None, None]
+    lines = boards[:, LINE_CELLS]
+    is_kitten = lines == kitten_codes
+    trios = (is_kitten | (lines == kitten_codes + 1)).all(axis=2) & is_kitten.any(axis=2)
+    graduated = np.nonzero(trios.any(axis=1))[0]
+    if len(graduated):
+        first = trios[graduated].argmax(axis=1)
+        boards[graduated[:, None], LINE_CELLS[first]] = 0
+        reserve[graduated, players[graduated]] += 3
+
+    # The mover wins with 8 cats on the board or three cats in a row
+    cat_codes = (2 + 2 * players)[:, None]
+    cats_on_board = np.count_nonzero(boards == cat_codes, axis=1)
+    cat_lines = (boards[:, LINE_CELLS] == cat_codes[:, :, None]).all(axis=2).any(axis=1)
+    return (cats_on_board >= 8) | cat_lines
+
+
+# A random empty cell for every game, with a cat half the time when the player has one in reserve
+def random_moves(boards, reserve, players, rng):
+    noise = rng.random((len(boards), NUM_CELLS))
+    noise[boards[:, :NUM_CELLS] != 0] = -1.0
+    cells = noise.argmax(axis=1)
+    has_cats = reserve[np.arange(len(boards)), players] > 0
+    cat_moves = (has_cats & (rng.random(len(boards)) < 0.5)).astype(np.int8)
+    return cells, cat_moves
+
+
+# For every game, the best of a few random moves: a win if one is found, otherwise the move whose position
+# batch_eval scores highest for the mover
+def guided_moves(boards, reserve, players, rng):
+    sign = np.where(players == 0, 1, -1)
+    best_cells = best_cat_moves = best_scores = None
+    for _ in range(GUIDED_SAMPLES):
+        cells, cat_moves = random_moves(boards, reserve, players, rng)
+        trial_boards = boards.copy()
+        trial_reserve = reserve.copy()
+        won = apply_moves(trial_boards, trial_reserve, players, cells, cat_moves)
+        scores = sign * evaluate_boards(trial_boards[:, :NUM_CELLS], trial_reserve[:, 0], trial_reserve[:, 1])
+        scores = np.where(won, np.iinfo(np.int64).max, scores)
+        if best_scores is None:
+            best_cells, best_cat_moves, best_scores = cells, cat_moves, scores
+        else:
+            better = scores > best_scores
+            best_cells = np.where(better, cells, best_cells)
+            best_cat_moves = np.where(better, cat_moves, best_cat_moves)
+            best_scores = np.where(better, scores, best_scores)
+    return best_cells, best_cat_moves
+
+
+POLICIES = {'random': random_moves, 'guided': guided_moves}
+
+
+class SelfPlaySimulator:
+    # policy is 'random' or 'guided' (or a function like random_moves); seed makes runs repeatable
+    def __init__(self, batch_size=1024, policy='random', max_moves=MAX_MOVES, seed=None):
+        self.batch_size = batch_size
+        self.policy = POLICIES[policy] if isinstance(policy, str) else policy
+        self.max_moves = max_moves
+        self.rng = np.random.default_rng(seed)
+
+    # Play num_games games, yielding (winner, move codes) for each as soon as it finishes.
+    # winner is 0 or 1, or None for a draw (board full or max_moves reached).
+    def play(self, num_games):
+        size = min(self.batch_size, num_games)
+        boards = np.zeros((size, NUM_CELLS + 1), dtype=np.int8)
+        reserve = np.zeros((size, 2), dtype=np.int16)
+        players = np.zeros(size, dtype=np.int8)
+        history = np.zeros((size, self.max_moves), dtype=np.int16)
+        lengths = np.zeros(size, dtype=np.intp)
+        active = np.ones(size, dtype=bool) # Slots playing a game that still counts
+        started = size
+        rows = np.arange(size)
+
+        while active.any():
+            cells, cat_moves = self.policy(boards, reserve, players, self.rng)
+            history[rows, lengths] = cells * 2 + cat_moves
+            lengths += 1
+            won = apply_moves(boards, reserve, players, cells, cat_moves)
+
+            board_full = np.all(boards[:, :NUM_CELLS] != 0, axis=1)
+            finished = np.nonzero(won | board_full | (lengths >= self.max_moves))[0]
+            for i in finished:
+                if active[i]:
+                    winner = int(players[i]) if won[i] else None
+                    yield winner, history[i, :lengths[i]].tolist()
+                    if started < num_games:
+                        started += 1
+                    else:
+                        active[i] = False
+
+            # Start a new game in each finished slot (slots no longer active just keep the batch shape)
+            boards[finished] = 0
+            reserve[finished] = 0
+            lengths[finished] = 0
+            players ^= 1
+            players[finished] = 0
+
+
+# Write games from a SelfPlaySimulator to a file, one per line. Returns the number of games written.
+def write_games(games, path):
+    count = 0
+    with open(path, 'w') as f:
+        for winner, moves in games:
+            f.write(('-' if winner is None else str(winner)) + ' ' + ' '.join(map(str, moves)) + '\n')
+            count += 1
+    return count
+
+
+# Read games written by write_games, yielding (winner, move codes) like SelfPlaySimulator.play
+def read_games(path):
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                yield (None if fields[0] == '-' else int(fields[0])), [int(code) for code in fields[1:]]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python selfplay.py <num_games> [batch_size] [random|guided] [output file]")
+        sys.exit(1)
+    num_games = int(sys.argv[1])
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    policy = sys.argv[3] if len(sys.argv) > 3 else 'random'
+    output = sys.argv[4] if len(sys.argv) > 4 else 'selfplay_games.txt'
+
+    start = time.perf_counter()
+    simulator = SelfPlaySimulator(batch_size, policy)
+    written = write_games(simulator.play(num_games), output)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} games to {output} in {elapsed:.1f}s ({written / elapsed * 3600:,.0f} games/hour)")
@@ -0,0 +1,98 @@
+# The 6x6 board looks the same after any of its 8 symmetries (4 rotations, each optionally mirrored), so a
+# position and its rotated or reflected copies can share one cache, book or dataset entry. This module maps
+# positions and moves to a canonical orientation and back.
+#
+# The canonical orientation is the one whose Zobrist key (see zobrist.py) is smallest, so canonical_key also
+# gives a cache key that is the same for all 8 orientations.
+# Note: booping and win conditions are symmetric, but when one move forms two trios at once the rules pick the
+# one with the smallest (y, x) cell, which depends on orientation. Those rare positions are treated as equivalent.
+
+from constants import BOARD_SIZE
+from zobrist import PIECE_KEYS, SIDE_TO_MOVE_KEY, reserve_key
+
+_N = BOARD_SIZE - 1
+
+# Each transform maps a cell (x, y) to where it ends up on the transformed board
+TRANSFORMS = [
+    lambda x, y: (x, y),            # identity
+    lambda x, y: (_N - y, x),       # rotate 90 degrees clockwise
+    lambda x, y: (_N - x, _N - y),  # rotate 180 degrees
+    lambda x, y: (y, _N - x),       # rotate 270 degrees clockwise
+    lambda x, y: (_N - x, y),       # mirror left-right
+    lambda x, y: (x, _N - y),       # mirror top-bottom
+    lambda x, y: (y, x),            # mirror on the main diagonal
+    lambda x, y: (_N - y, _N - x),  # mirror on the anti-diagonal
+]
+IDENTITY = 0
+
+# CELL_MAPS[t][y][x] is where (x, y) goes under transform t
+CELL_MAPS = [[[transform(x, y) for x in range(BOARD_SIZE)] for y in range(BOARD_SIZE)] for transform in TRANSFORMS]
+
+def _find_inverse(t):
+    for u in range(len(TRANSFORMS)):
+        if all(CELL_MAPS[u][ty][tx] == (x, y)
+               for y in range(BOARD_SIZE) for x in range(BOARD_SIZE)
+               for tx, ty in [CELL_MAPS[t][y][x]]):
+            return u
+
+# INVERSE[t] is the transform that undoes transform t
+INVERSE = [_find_inverse(t) for t in range(len(TRANSFORMS))]
+
+# TRANSFORMED_PIECE_KEYS[y][x] lists, for each transform, the Zobrist keys of (x, y) after that transform
+TRANSFORMED_PIECE_KEYS = [[[PIECE_KEYS[CELL_MAPS[t][y][x][1]][CELL_MAPS[t][y][x][0]] for t in range(len(TRANSFORMS))]
+                           for x in range(BOARD_SIZE)]
+                          for y in range(BOARD_SIZE)]
+
+
+# Returns a new board with transform t applied
+def transform_board(board, t):
+    new_board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    cell_map = CELL_MAPS[t]
+    for y in range(BOARD_SIZE):
+        for x in range(BOARD_SIZE):
+            if board[y][x] is not None:
+                new_x, new_y = cell_map[y][x]
+                new_board[new_y][new_x] = board[y][x]
+    return new_board
+
+
+# Map a move (x, y, piece_type) through transform t
+def transform_move(move, t):
+    x, y, piece_type = move
+    new_x, new_y = CELL_MAPS[t][y][x]
+    return (new_x, new_y, piece_type)
+
+
+# Map a move on a transformed board back to the original orientation
+def untransform_move(move, t):
+    return transform_move(move, INVERSE[t])
+
+
+# Zobrist keys of the position under all 8 transforms, from a single pass over the board
+def transformed_keys(board, orange_cats, black_cats, current_player):
+    base = reserve_key(0, orange_cats) ^ reserve_key(1, black_cats)
+    if current_player == 1:
+        base ^= SIDE_TO_MOVE_KEY
+    keys = [base] * len(TRANSFORMS)
+    for y in range(BOARD_SIZE):
+        for x in range(BOARD_SIZE):
+            piece = board[y][x]
+            if piece is not None:
+                cell_keys = TRANSFORMED_PIECE_KEYS[y][x]
+                for t in range(len(TRANSFORMS)):
+                    keys[t] ^= cell_keys[t][piece]
+    return keys
+
+
+# Returns (key, t): the key shared by all orientations of the position, and the transform that takes
+# this board to the canonical orientation
+def canonical_key(board, orange_cats, black_cats, current_player):
+    keys = transformed_keys(board, orange_cats, black_cats, current_player)
+    t = min(range(len(keys)), key=keys.__getitem__)
+    return keys[t], t
+
+
+# Returns (canonical board, t). Moves found on the canonical board map back with untransform_move(move, t).
+def canonicalize(board, orange_cats, black_cats, current_player):
+    _, t = canonical_key(board, orange_cats, black_cats, current_player)
+    return transform_board(board, t), t
@@ -0,0 +1,232 @@
+# Headless tournament runner for comparing engines, e.g. two heuristics or two search depths. Games are played
+# with BoopGame without the GUI or its delays, spread across a pool of worker processes. Each pair of games
+# uses one seed with the colors swapped, so neither engine gets the better side of a lucky seed.
+# Results are reported as Elo with a 95% error bar, and a head-to-head match can stop early with an SPRT
+# once it is clear whether the first engine is stronger.
+#
+# Engines are given as specs:
+#   minimax:depth=3        minimax:time=0.5,tt=16     (time is seconds per move)
+#   minimax:depth=2,solver=0                          (forced-win solver node budget, 0 = off)
+#   minimax:depth=2,quiescence=16                     (quiescence node cap per leaf, default 0 = off)
+#   minimax:depth=2,book=1                            (play opening book moves, default 0 = off)
+#   mcts:playouts=1000     mcts:time=0.5,guided=1
+#   random
+#
+# Usage:
+#   python tournament.py minimax:depth=2 minimax:depth=3 --games 200 --workers 4
+#   python tournament.py minimax:depth=2 minimax:depth=3 --sprt 0 50
+#   python tournament.py random minimax:depth=1 mcts:playouts=500 --games 40   (round robin)
+
+import argparse
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game import BoopGame
+from rules import BoopRules
+from ai import BoopAI, QUIESCENCE_NODES, SOLVER_NODES
+from mcts import BoopMCTS
+from bitboard import BitBoard
+
+MAX_GAME_MOVES = 300 # Games still going after this many moves are draws
+
+
+# Plays uniformly random legal moves
+class RandomEngine:
+    def get_best_move(self, board, orange_cats, black_cats, current_player_idx):
+        moves = BitBoard.from_board(board, orange_cats, black_cats).get_possible_moves(current_player_idx)
+        return random.choice(moves) if moves else None
+
+
+# Build an engine from a spec string like "minimax:depth=3" (see the top of this file)
+def make_engine(spec):
+    kind, _, options = spec.partition(':')
+    params = dict(option.split('=', 1) for option in options.split(',') if option)
+    time_limit = float(params['time']) if 'time' in params else None
+
+    if kind == 'minimax':
+        return BoopAI(BoopRules(), int(params.get('depth', 2)), tt_size_mb=int(params.get('tt', 16)),
+                      time_limit=time_limit, solver_nodes=int(params.get('solver', SOLVER_NODES)),
+                      quiescence_nodes=int(params.get('quiescence', QUIESCENCE_NODES)),
+                      use_book=params.get('book', '0') not in ('0', 'false'))
+    if kind == 'mcts':
+        return BoopMCTS(playouts=int(params.get('playouts', 1000)), time_limit=time_limit,
+                        guided=params.get('guided', '0') not in ('0', 'false'))
+    if kind == 'random':
+        return RandomEngine()
+    raise ValueError(f"Unknown engine '{spec}'")
+
+
+# Play one game between two engine specs. Returns the winner (0 = orange, 1 = black, None for a draw).
+def play_game(orange_spec, black_spec, seed=None):
+    if seed is not None:
+        random.seed(seed)
+    engines = [make_engine(orange_spec), make_engine(black_spec)]
+    game = BoopGame(ai_depth=1, ai_time_limit=None)
+    try:
+        for _ in range(MAX_GAME_MOVES):
+            engine = engines[game.whoseturn]
+            move = engine.get_best_move(game.board, game.orange_cats, game.black_cats, game.whoseturn)
+            if move is None:
+                return None
+            game.process_move(*move)
+            if game.win_msg:
+                return game.whoseturn
+        return None
+    finally:
+        for engine in engines:
+            if isinstance(engine, BoopAI):
+                engine.close()
+
+
+# Win/draw/loss tally of one engine against another
+class MatchResult:
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    # Record a game; first_won is True, False, or None for a draw
+    def add(self, first_won):
+        if first_won is None:
+            self.draws += 1
+        elif first_won:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    # The first engine's mean score per game and the variance of one game's score
+    def score_stats(self):
+        n = self.games()
+        score = (self.wins + 0.5 * self.draws) / n
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 +
+                    self.losses * score ** 2) / n
+        return score, variance
+
+    # Games, score and variance for the error estimates. A clean sweep (or all draws) has no variance to work
+    # with, so it counts one more win and one more loss.
+    def padded_stats(self):
+        score, variance = self.score_stats()
+        if variance > 0:
+            return self.games(), score, variance
+        padded = MatchResult(self.first, self.second)
+        padded.wins, padded.draws, padded.losses = self.wins + 1, self.draws, self.losses + 1
+        return (padded.games(),) + padded.score_stats()
+
+    # Elo difference of the first engine over the second and its 95% error margin
+    def elo(self):
+        score = self.score_stats()[0]
+        games, padded_score, variance = self.padded_stats()
+        margin = 1.96 * math.sqrt(variance / games)
+        low = elo_from_score(padded_score - margin)
+        high = elo_from_score(padded_score + margin)
+        return elo_from_score(score), (high - low) / 2
+
+    # Log-likelihood ratio of "the first engine is elo1 stronger" over "it is elo0 stronger",
+    # using the normal approximation to the game score distribution
+    def sprt_llr(self, elo0, elo1):
+        if self.games() == 0:
+            return 0.0
+        games, score, variance = self.padded_stats()
+        score0 = score_from_elo(elo0)
+        score1 = score_from_elo(elo1)
+        return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def __str__(self):
+        elo, margin = self.elo()
+        return (f"{self.first} vs {self.second}: +{self.wins} ={self.draws} -{self.losses} "
+                f"({self.games()} games)  Elo {elo:+.0f} +/- {margin:.0f}")
+
+
+def score_from_elo(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+# Elo difference for a mean score, clamped so a clean sweep gives a large finite number
+def elo_from_score(score):
+    score = min(max(score, 0.001), 0.999)
+    return 400 * math.log10(score / (1 - score))
+
+
+# SPRT stopping bounds on the log-likelihood ratio for false positive rate alpha and false negative rate beta
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# Play games between two engines with colors alternating. With sprt=(elo0, elo1) the match stops as soon as
+# the SPRT accepts either hypothesis. Returns the MatchResult and the SPRT decision ('H0', 'H1' or None).
+def run_match(pool, first, second, games, seed=None, sprt=None, alpha=0.05, beta=0.05):
+    result = MatchResult(first, second)
+    futures = {}
+    for i in range(games):
+        game_seed = None if seed is None else seed * 1000003 + i // 2
+        if i % 2 == 0:
+            futures[pool.submit(play_game, first, second, game_seed)] = 0 # first plays orange
+        else:
+            futures[pool.submit(play_game, second, first, game_seed)] = 1
+
+    decision = None
+    lower, upper = sprt_bounds(alpha, beta)
+    for future in as_completed(futures):
+        winner = future.result()
+        result.add(None if winner is None else winner == futures[future])
+        if sprt is not None:
+            llr = result.sprt_llr(*sprt)
+            if llr >= upper or llr <= lower:
+                decision = 'H1' if llr >= upper else 'H0'
+                for pending in futures:
+                    pending.cancel()
+                break
+    return result, decision
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play engines against each other without the GUI")
+    parser.add_argument('engines', nargs='+', help="engine specs, e.g. minimax:depth=3 mcts:playouts=500 random")
+    parser.add_argument('--games', type=int, default=100, help="games per pairing (default 100)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes (default: all CPUs)")
+    parser.add_argument('--seed', type=int, default=None, help="base random seed for repeatable matches")
+    parser.add_argument('--sprt', type=float, nargs=2, metavar=('ELO0', 'ELO1'), default=None,
+                        help="stop a head-to-head match early once it is clear which Elo hypothesis holds")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate (default 0.05)")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate (default 0.05)")
+    args = parser.parse_args()
+
+    if len(args.engines) < 2:
+        parser.error("need at least two engines")
+    if args.sprt is not None and len(args.engines) != 2:
+        parser.error("--sprt is only for a head-to-head match between two engines")
+    for spec in args.engines:
+        make_engine(spec) # Fail on a bad spec before starting any games
+
+    # Round robin: every pairing plays its own match; a total score table follows
+    totals = {spec: [0.0, 0] for spec in args.engines}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for i, first in enumerate(args.engines):
+            for second in args.engines[i + 1:]:
+                result, decision = run_match(pool, first, second, args.games, args.seed, args.sprt,
+                                             args.alpha, args.beta)
+                print(result)
+                if args.sprt is not None:
+                    elo0, elo1 = args.sprt
+                    if decision == 'H1':
+                        print(f"SPRT: H1 accepted, {first} is at least {elo1:+g} Elo stronger")
+                    elif decision == 'H0':
+                        print(f"SPRT: H0 accepted, {first} is at most {elo0:+g} Elo stronger")
+                    else:
+                        print("SPRT: no decision within the game limit")
+                first_score = result.wins + 0.5 * result.draws
+                totals[first][0] += first_score
+                totals[second][0] += result.games() - first_score
+                totals[first][1] += result.games()
+                totals[second][1] += result.games()
+
+    if len(args.engines) > 2:
+        print("\nStandings:")
+        for spec, (score, games) in sorted(totals.items(), key=lambda item: -item[1][0] / max(item[1][1], 1)):
+            print(f"  {spec}: {score:g}/{games} ({100 * score / max(games, 1):.1f}%)")
@@ -0,0 +1,46 @@
+# This class is a fixed-size transposition table for the minimax search. Booping scrambles the order pieces
+# were placed in, so the same position is reached through many move orders; storing the result of each search
+# by the position's Zobrist key lets the search reuse it instead of searching the position again.
+# The table is a flat list of slots sized from a memory cap, and when two positions share a slot the one
+# searched deeper is kept (entries from earlier searches are always replaced).
+
+# Bound types: whether a stored score is the exact value or only a lower/upper bound on it
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Rough memory used by one stored entry (the entry tuple, its key and score ints and the slot pointer)
+ENTRY_BYTES = 240
+
+class TranspositionTable:
+    def __init__(self, size_mb=64):
+        self.size_mb = size_mb
+        self.num_slots = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.slots = [None] * self.num_slots
+        self.generation = 0
+
+    # Start a new search; entries from earlier searches are kept for lookups but are the first to be replaced
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * self.num_slots
+        self.generation = 0
+
+    # Returns the entry (key, depth, score, bound, best_move, generation) for a position, or None
+    def probe(self, key):
+        entry = self.slots[key % self.num_slots]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    # Store a search result, keeping whichever of the new and existing entries was searched deeper
+    def store(self, key, depth, score, bound, best_move):
+        idx = key % self.num_slots
+        old = self.slots[idx]
+        if old is None or old[5] != self.generation or depth >= old[1]:
+            self.slots[idx] = (key, depth, score, bound, best_move, self.generation)
+
+    # Number of slots in use
+    def __len__(self):
+        return self.num_slots - self.slots.count(None)
@@ -0,0 +1,72 @@
+# Zobrist hashing of positions: every (cell, piece), reserve-cat count and side to move has a fixed random
+# 64-bit key, and a position's key is the XOR of the keys of everything in it. Making or undoing a move
+# only XORs in the keys of what changed, so the key is kept up to date without walking the board.
+# Keys come from a fixed seed so the same position has the same key in every process and every run.
+
+import random
+from pieces import PieceType, PieceColor, get_piece
+from constants import BOARD_SIZE
+
+ZOBRIST_SEED = 0x600B
+
+_rng = random.Random(ZOBRIST_SEED)
+
+# PIECE_KEYS[y][x][piece] for each of the four interned pieces
+PIECE_KEYS = [[{get_piece(piece_type, color): _rng.getrandbits(64)
+                for color in (PieceColor.ORANGE, PieceColor.BLACK)
+                for piece_type in (PieceType.KITTEN, PieceType.CAT)}
+               for _ in range(BOARD_SIZE)]
+              for _ in range(BOARD_SIZE)]
+
+# XORed in when it is black's (player 1's) turn
+SIDE_TO_MOVE_KEY = _rng.getrandbits(64)
+
+# RESERVE_KEYS[player_idx][count]; reserve counts have no fixed limit, so this grows on demand
+RESERVE_KEYS = [[_rng.getrandbits(64) for _ in range(32)] for _ in range(2)]
+
+
+def reserve_key(player_idx, count):
+    keys = RESERVE_KEYS[player_idx]
+    while count >= len(keys):
+        keys.append(random.Random(ZOBRIST_SEED ^ (player_idx << 32) ^ len(keys)).getrandbits(64))
+    return keys[count]
+
+
+# Key of a whole position, computed from scratch. Only needed once for a position that arrives from
+# outside (a new game, or a board sent by the server); after that keep it current with the functions below.
+def compute_key(board, orange_cats, black_cats, current_player):
+    key = reserve_key(0, orange_cats) ^ reserve_key(1, black_cats)
+    if current_player == 1:
+        key ^= SIDE_TO_MOVE_KEY
+    for y in range(BOARD_SIZE):
+        for x in range(BOARD_SIZE):
+            piece = board[y][x]
+            if piece is not None:
+                key ^= PIECE_KEYS[y][x][piece]
+    return key
+
+
+# Key change for the piece moves of one turn: the placed piece, each boop from a check_boop list
+# (pieces booped off the board are only removed) and the pieces of a graduated trio given as (x, y, piece)
+def move_key_delta(x, y, piece, moves_made, trio_pieces=None):
+    delta = PIECE_KEYS[y][x][piece]
+    for boop in moves_made:
+        from_x, from_y = boop['from']
+        to_x, to_y = boop['to']
+        delta ^= PIECE_KEYS[from_y][from_x][boop['piece']]
+        if to_x >= 0:
+            delta ^= PIECE_KEYS[to_y][to_x][boop['piece']]
+    if trio_pieces:
+        for px, py, trio_piece in trio_pieces:
+            delta ^= PIECE_KEYS[py][px][trio_piece]
+    return delta
+
+
+# Key change for reserve cats going from the old counts to the new ones
+def reserve_key_delta(old_orange_cats, old_black_cats, new_orange_cats, new_black_cats):
+    delta = 0
+    if old_orange_cats != new_orange_cats:
+        delta ^= reserve_key(0, old_orange_cats) ^ reserve_key(0, new_orange_cats)
+    if old_black_cats != new_black_cats:
+        delta ^= reserve_key(1, old_black_cats) ^ reserve_key(1, new_black_cats)
+    return delta